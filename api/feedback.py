@@ -1,7 +1,7 @@
 """
 Vercel Serverless Function for email click tracking.
 
-Stores the interaction then redirects to connect3.app.
+Redirects to connect3.app, then stores the interaction.
 Includes input validation, rate limiting, and time decay policy.
 
 Time Decay Policy: Clicks on newsletters older than 15 days
@@ -13,13 +13,15 @@ from __future__ import annotations
 import json
 import logging
 import os
-import re
+import string
 import time
-from collections import defaultdict
-from datetime import datetime, timezone, timedelta
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
 from http.server import BaseHTTPRequestHandler
 from threading import Lock
-from urllib.parse import parse_qs, urlparse
+
+import httpx
 
 import sys
 from pathlib import Path
@@ -28,7 +30,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from python_app.supabase_client import supabase, ensure_ok
-from python_app.categories import CONNECT3_CATEGORIES, UNIFORM_BASELINE
+from python_app.categories import UNIFORM_BASELINE, VALID_API_CATEGORIES
+from python_app.http_utils import parse_query, send_body, send_redirect
 
 # Configure logging
 logging.basicConfig(
@@ -45,62 +48,155 @@ APP_URL = os.environ.get("NEXT_PUBLIC_APP_URL") or os.environ.get("NEXT_PUBLIC_S
 
 # Time decay: clicks older than this many days don't affect preferences
 PREFERENCE_DECAY_DAYS = 15
+_DECAY_SECS = PREFERENCE_DECAY_DAYS * 86400
+
+# Preference adjustments applied per like/dislike
+PREFERENCE_SCORE_INCREMENT = 0.05
+PREFERENCE_NEW_USER_LIKE_BOOST = 0.1  # First like for a user without a preferences row
 
 # Rate limiting settings
 RATE_LIMIT_WINDOW_SECONDS = 60  # 1 minute window
 RATE_LIMIT_MAX_REQUESTS = 30    # Max 30 requests per minute per user
-
-# Validation patterns
-UUID_PATTERN = re.compile(
-    r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$',
-    re.IGNORECASE
-)
-EVENT_ID_PATTERN = re.compile(r'^[a-zA-Z0-9_-]{1,64}$')
-CATEGORY_PATTERN = re.compile(r'^[a-z_]{1,50}$')
-ACTION_WHITELIST = {'like', 'dislike', 'click'}
-
-# Valid categories - uses shared CONNECT3_CATEGORIES from categories.py
+RATE_LIMIT_MAX_TRACKED_USERS = 10_000  # Least recently seen users are evicted past this
+_ERR_RATE_LIMITED = json.dumps({'error': 'Too many requests. Please try again later.'}).encode()
+
+# Validation character sets (ASCII only; plain set checks instead of regex matching)
+UUID_HEX_CHARS = frozenset(string.hexdigits)
+UUID_DASH_POSITIONS = (8, 13, 18, 23)
+EVENT_ID_CHARS = frozenset(string.ascii_letters + string.digits + '_-')
+EVENT_ID_MAX_LENGTH = 64
+CATEGORY_CHARS = frozenset(string.ascii_lowercase + '_')
+CATEGORY_MAX_LENGTH = 50
+ACTION_WHITELIST = frozenset({'like', 'dislike', 'click'})
+
+# Valid categories - shared frozenset from categories.py
 # Note: 'general' is added as a fallback for validation
-VALID_CATEGORIES = set(CONNECT3_CATEGORIES) | {'general'}
+VALID_CATEGORIES = VALID_API_CATEGORIES
 
 # =============================================================================
-# Rate Limiting (In-Memory for Serverless)
+# Rate Limiting (Shared via Upstash Redis, In-Memory Fallback)
 # =============================================================================
 
-# In-memory rate limit store (resets on cold start, which is acceptable for serverless)
-_rate_limit_store: dict = defaultdict(list)
+# Upstash Redis REST endpoint shared by all instances. When unset (local dev,
+# tests) or unreachable, the per-instance in-memory limiter below is used.
+UPSTASH_REDIS_REST_URL = os.environ.get("UPSTASH_REDIS_REST_URL")
+UPSTASH_REDIS_REST_TOKEN = os.environ.get("UPSTASH_REDIS_REST_TOKEN")
+RATE_LIMIT_KEY_PREFIX = "connect3:feedback:ratelimit:"
+
+# Short timeout: a slow or unreachable Redis must not stall the redirect. After
+# a failure the in-memory limiter is used for a cooldown instead of retrying
+# (and timing out) on every request.
+REDIS_TIMEOUT_SECONDS = 0.3
+REDIS_FAILURE_COOLDOWN_SECONDS = 30
+
+# Trim the window, then record the hit only if the user is still under the
+# limit, so rejected requests never keep the window full. Returns 1 if limited.
+# KEYS[1] = set key; ARGV = now, window_start, limit, member, ttl
+_RATE_LIMIT_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[2])
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+  return 1
+end
+redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return 0
+"""
+
+_redis_http = (
+    httpx.Client(timeout=httpx.Timeout(REDIS_TIMEOUT_SECONDS))
+    if UPSTASH_REDIS_REST_URL and UPSTASH_REDIS_REST_TOKEN
+    else None
+)
+_redis_disabled_until = 0.0
+
+# In-memory rate limit store (resets on cold start, which is acceptable for serverless).
+# Each user gets a deque of request timestamps, oldest first, never longer than the limit.
+# Users are kept in LRU order so a long-lived warm instance cannot grow without bound.
+_rate_limit_store: OrderedDict[str, deque] = OrderedDict()
 _rate_limit_lock = Lock()
 
 
-def is_rate_limited(user_id: str) -> bool:
+def _is_rate_limited_redis(user_id: str, now: float) -> bool:
     """
-    Check if a user has exceeded the rate limit.
-    
-    Uses a sliding window algorithm: tracks timestamps of requests
-    within the window and rejects if count exceeds threshold.
+    Check and record a request against the user's Redis sorted set.
+
+    Runs as one server-side script, so concurrent instances see a consistent
+    count and a rejected request is not added to the window.
     """
-    if not user_id:
-        return False
-    
-    now = time.time()
+    key = f"{RATE_LIMIT_KEY_PREFIX}{user_id}"
+    window_start = now - RATE_LIMIT_WINDOW_SECONDS
+    member = f"{now:.6f}:{uuid.uuid4().hex[:8]}"
+    response = _redis_http.post(
+        UPSTASH_REDIS_REST_URL.rstrip('/'),
+        headers={"Authorization": f"Bearer {UPSTASH_REDIS_REST_TOKEN}"},
+        json=[
+            "EVAL", _RATE_LIMIT_SCRIPT, "1", key,
+            f"{now:.6f}", f"{window_start:.6f}", str(RATE_LIMIT_MAX_REQUESTS),
+            member, str(RATE_LIMIT_WINDOW_SECONDS),
+        ],
+    )
+    response.raise_for_status()
+    return int(response.json()["result"]) == 1
+
+
+def _is_rate_limited_in_memory(user_id: str, now: float) -> bool:
+    """Per-instance sliding window over a deque of request timestamps."""
     window_start = now - RATE_LIMIT_WINDOW_SECONDS
     
     with _rate_limit_lock:
+        timestamps = _rate_limit_store.get(user_id)
+        if timestamps is None:
+            timestamps = _rate_limit_store[user_id] = deque(maxlen=RATE_LIMIT_MAX_REQUESTS)
+            if len(_rate_limit_store) > RATE_LIMIT_MAX_TRACKED_USERS:
+                _rate_limit_store.popitem(last=False)
+        else:
+            _rate_limit_store.move_to_end(user_id)
+        
         # Clean old entries
-        _rate_limit_store[user_id] = [
-            ts for ts in _rate_limit_store[user_id] if ts > window_start
-        ]
+        while timestamps and timestamps[0] <= window_start:
+            timestamps.popleft()
         
         # Check limit
-        if len(_rate_limit_store[user_id]) >= RATE_LIMIT_MAX_REQUESTS:
-            logger.warning(f"Rate limit exceeded for user {user_id}")
+        if len(timestamps) >= RATE_LIMIT_MAX_REQUESTS:
             return True
         
         # Record this request
-        _rate_limit_store[user_id].append(now)
+        timestamps.append(now)
         return False
 
 
+def is_rate_limited(user_id: str) -> bool:
+    """
+    Check if a user has exceeded the rate limit.
+    
+    Uses a sliding window algorithm: tracks timestamps of requests
+    within the window and rejects if count exceeds threshold. With Upstash
+    configured the window lives in a Redis sorted set shared by every
+    instance; otherwise (or if Redis fails) each instance keeps its own
+    deque, where expired timestamps are popped from the front in amortized O(1).
+    """
+    if not user_id:
+        return False
+    
+    now = time.time()
+    
+    global _redis_disabled_until
+    limited = None
+    if _redis_http is not None and now >= _redis_disabled_until:
+        try:
+            limited = _is_rate_limited_redis(user_id, now)
+        except Exception as e:
+            _redis_disabled_until = now + REDIS_FAILURE_COOLDOWN_SECONDS
+            logger.warning("Redis rate limit unavailable, using in-memory fallback: %s", e)
+    
+    if limited is None:
+        limited = _is_rate_limited_in_memory(user_id, now)
+    
+    if limited:
+        logger.warning("Rate limit exceeded for user %s", user_id)
+    return limited
+
+
 # =============================================================================
 # Input Validation
 # =============================================================================
@@ -110,13 +206,29 @@ class ValidationError(Exception):
     pass
 
 
+def _is_uuid(value: str) -> bool:
+    """Check canonical 8-4-4-4-12 hex UUID layout (any case)."""
+    if len(value) != 36:
+        return False
+    for pos in UUID_DASH_POSITIONS:
+        if value[pos] != '-':
+            return False
+    hex_digits = value.replace('-', '')
+    return len(hex_digits) == 32 and UUID_HEX_CHARS.issuperset(hex_digits)
+
+
+def _is_token(value: str, allowed: frozenset, max_length: int) -> bool:
+    """Check a non-empty string of at most max_length chars drawn from allowed."""
+    return 0 < len(value) <= max_length and allowed.issuperset(value)
+
+
 def validate_user_id(user_id: str | None) -> str:
     """Validate and sanitize user ID (UUID format)."""
     if not user_id:
         raise ValidationError("Missing user_id parameter")
     
     user_id = user_id.strip()
-    if not UUID_PATTERN.match(user_id):
+    if not _is_uuid(user_id):
         raise ValidationError(f"Invalid user_id format: {user_id[:20]}...")
     
     return user_id
@@ -128,7 +240,7 @@ def validate_event_id(event_id: str | None) -> str:
         raise ValidationError("Missing event_id parameter")
     
     event_id = event_id.strip()
-    if not EVENT_ID_PATTERN.match(event_id):
+    if not _is_token(event_id, EVENT_ID_CHARS, EVENT_ID_MAX_LENGTH):
         raise ValidationError(f"Invalid event_id format: {event_id[:20]}...")
     
     return event_id
@@ -140,15 +252,16 @@ def validate_category(category: str | None) -> str:
         return "general"
     
     category = category.strip().lower()
-    if not CATEGORY_PATTERN.match(category):
-        logger.warning(f"Invalid category format: {category[:20]}, defaulting to general")
-        return "general"
+    # Fast path: links from our own emails always carry a known category
+    if category in VALID_CATEGORIES:
+        return category
     
-    if category not in VALID_CATEGORIES:
-        logger.warning(f"Unknown category: {category}, defaulting to general")
+    if not _is_token(category, CATEGORY_CHARS, CATEGORY_MAX_LENGTH):
+        logger.warning(f"Invalid category format: {category[:20]}, defaulting to general")
         return "general"
     
-    return category
+    logger.warning(f"Unknown category: {category}, defaulting to general")
+    return "general"
 
 
 def validate_action(action: str | None) -> str:
@@ -171,7 +284,7 @@ def validate_timestamp(timestamp: str | None) -> str | None:
     
     try:
         # Attempt to parse - this validates format
-        datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+        datetime.fromisoformat(timestamp)
         return timestamp
     except (ValueError, AttributeError):
         logger.warning(f"Invalid timestamp format: {timestamp[:30]}")
@@ -191,138 +304,115 @@ def is_within_decay_window(email_sent_at: str | None) -> bool:
         return True  # No timestamp = allow update (backwards compatibility)
     
     try:
-        sent_date = datetime.fromisoformat(email_sent_at.replace("Z", "+00:00"))
-        now = datetime.now(timezone.utc)
-        age = now - sent_date
-        return age <= timedelta(days=PREFERENCE_DECAY_DAYS)
+        sent_date = datetime.fromisoformat(email_sent_at)
+        if sent_date.tzinfo is None:
+            sent_date = sent_date.replace(tzinfo=timezone.utc)
+        # Compare as POSIX seconds rather than via datetime/timedelta arithmetic
+        return sent_date.timestamp() >= time.time() - _DECAY_SECS
     except Exception:
         return True  # Parse error = allow update (fail-safe)
 
 
-def store_interaction(user_id: str, event_id: str, action: str) -> bool:
+def _preference_deltas(category: str, action: str) -> tuple[float, float] | None:
+    """Return (delta, initial_delta) for interactions that move preference scores."""
+    # Only explicit feedback on a real category moves scores; a click is recorded
+    # but is not a preference signal
+    if category == 'general' or action not in ('like', 'dislike'):
+        return None
+    if action == 'like':
+        return PREFERENCE_SCORE_INCREMENT, PREFERENCE_NEW_USER_LIKE_BOOST
+    return -PREFERENCE_SCORE_INCREMENT, -PREFERENCE_SCORE_INCREMENT
+
+
+def record_interaction(user_id: str, event_id: str, category: str, action: str,
+                       apply_preferences: bool = True) -> bool:
     """
-    Store or update an interaction in the database.
+    Store an interaction and its preference update in one round-trip.
+
+    Both writes run in the record_click function (database/user_preferences.sql):
+    the interaction is upserted on (subscriber_id, event_id) and, for a like or
+    dislike with apply_preferences set, the category score is bumped and
+    renormalized in the same transaction.
     Returns True if successful, False otherwise.
     """
     if not supabase:
         logger.error("Supabase client not initialized - check SUPABASE_URL and SUPABASE_SERVICE_KEY env vars")
         return False
     
+    deltas = _preference_deltas(category, action) if apply_preferences else None
+    delta, initial_delta = deltas or (0.0, None)
+    
     try:
-        logger.info(f"Attempting to store interaction: user={user_id[:8]}..., event={event_id}, action={action}")
-        
-        # Check for existing interaction (prevent duplicates)
-        existing = (
-            supabase.table('interactions')
-            .select('id, interaction_type')
-            .eq('subscriber_id', user_id)
-            .eq('event_id', event_id)
-            .limit(1)
-            .execute()
+        result = supabase.rpc('record_click', {
+            'p_subscriber_id': user_id,
+            'p_event_id': event_id,
+            'p_action': action,
+            'p_category': category,
+            'p_update_preferences': deltas is not None,
+            'p_delta': delta,
+            'p_baseline': UNIFORM_BASELINE,
+            'p_initial_delta': initial_delta,
+        }).execute()
+        ensure_ok(result, action="rpc record_click")
+        logger.info(
+            f"Recorded interaction: user={user_id[:8]}..., event={event_id}, action={action}"
+            + (f", {category} {delta:+.2f}" if deltas else "")
         )
-        
-        now_iso = datetime.now(timezone.utc).isoformat()
-        if existing.data:
-            # Refresh the interaction timestamp so recency reflects latest engagement.
-            result = supabase.table('interactions').update({
-                'interaction_type': action,
-                'created_at': now_iso,
-            }).eq('id', existing.data[0]['id']).execute()
-            ensure_ok(result, action="update interactions")
-            logger.info(f"Updated interaction: user={user_id[:8]}..., event={event_id}, action={action}, result={result}")
-        else:
-            # Insert new interaction
-            result = supabase.table('interactions').insert({
-                'subscriber_id': user_id,
-                'event_id': event_id,
-                'interaction_type': action,
-                'created_at': now_iso,
-            }).execute()
-            ensure_ok(result, action="insert interactions")
-            logger.info(f"Created interaction: user={user_id[:8]}..., event={event_id}, action={action}, result_data={result.data}")
-        
         return True
     except Exception as e:
-        logger.error(f"Error storing interaction: {type(e).__name__}: {e}")
+        logger.error(f"Error recording interaction: {type(e).__name__}: {e}")
         return False
 
 
-def update_preferences(user_id: str, category: str, action: str) -> None:
-    """Update user preferences based on interaction."""
-    if not supabase or category == 'general':
-        return
-    
+# =============================================================================
+# HTTP Handler
+# =============================================================================
+
+def handle_get(request: BaseHTTPRequestHandler) -> None:
+    """Handle GET requests for feedback tracking."""
+    app_base = APP_URL.rstrip("/")
+    redirected = False
     try:
-        SCORE_INCREMENT = 0.05
-        ALL_CATEGORIES = list(CONNECT3_CATEGORIES)
+        # Parse query parameters
+        params = parse_query(request.path)
         
-        def coerce_score(value, fallback):
-            try:
-                return float(value)
-            except (TypeError, ValueError):
-                return fallback
-
-        def normalize_scores(scores):
-            total = 0.0
-            for cat in ALL_CATEGORIES:
-                total += max(0.0, coerce_score(scores.get(cat), UNIFORM_BASELINE))
-            if total <= 0:
-                return {cat: UNIFORM_BASELINE for cat in ALL_CATEGORIES}
-            return {
-                cat: max(0.0, coerce_score(scores.get(cat), UNIFORM_BASELINE)) / total
-                for cat in ALL_CATEGORIES
-            }
-
-        prefs = (
-            supabase.table('user_preferences')
-            .select('*')
-            .eq('subscriber_id', user_id)
-            .limit(1)
-            .execute()
-        )
+        # Extract and validate parameters
+        try:
+            user_id = validate_user_id(params.get('uid'))
+            event_id = validate_event_id(params.get('eid'))
+            category = validate_category(params.get('cat', 'general'))
+            action = validate_action(params.get('action', 'like'))
+            email_sent_at = validate_timestamp(params.get('sent'))
+        except ValidationError as e:
+            logger.warning(f"Validation error: {e}")
+            send_redirect(request, f"{app_base}?error=invalid_params")
+            return
+        
+        # Rate limiting check
+        if is_rate_limited(user_id):
+            send_body(request, 429, _ERR_RATE_LIMITED, 'application/json')
+            return
+        
+        # Redirect to success page before touching the database; the
+        # browser only needs the 302, not the outcome of the writes
+        send_redirect(request, app_base)
+        request.wfile.flush()
+        redirected = True
+        
+        # Update preferences only if within decay window
+        apply_preferences = is_within_decay_window(email_sent_at)
+        if not apply_preferences:
+            logger.info(f"Skipping preference update: email older than {PREFERENCE_DECAY_DAYS} days")
+        
+        # Store the interaction (and preference bump) before returning;
+        # serverless may freeze the instance once the handler exits
+        record_interaction(user_id, event_id, category, action, apply_preferences)
         
-        effective_action = "like" if action == "click" else action
-        if prefs.data:
-            current_score = coerce_score(prefs.data[0].get(category), UNIFORM_BASELINE)
-            if effective_action == 'like':
-                new_score = min(1.0, current_score + SCORE_INCREMENT)
-            else:
-                new_score = max(0.0, current_score - SCORE_INCREMENT)
-
-            updated_scores = {
-                cat: coerce_score(prefs.data[0].get(cat), UNIFORM_BASELINE)
-                for cat in ALL_CATEGORIES
-            }
-            updated_scores[category] = new_score
-            normalized_scores = normalize_scores(updated_scores)
-
-            supabase.table('user_preferences').update(
-                normalized_scores
-            ).eq('subscriber_id', user_id).execute()
-            logger.debug(
-                f"Updated preference: {category} = {normalized_scores.get(category, 0.0):.3f}"
-            )
-        else:
-            # New user: create COMPLETE preference record with all 13 categories
-            # Start with uniform baseline for all categories
-            pref_scores = {cat: UNIFORM_BASELINE for cat in ALL_CATEGORIES}
-            
-            # Adjust the interacted category based on action
-            if effective_action == 'like':
-                pref_scores[category] = UNIFORM_BASELINE + 0.1
-            else:
-                pref_scores[category] = max(0.0, UNIFORM_BASELINE - SCORE_INCREMENT)
-
-            pref_record = {'subscriber_id': user_id, **normalize_scores(pref_scores)}
-            supabase.table('user_preferences').insert(pref_record).execute()
-            logger.info(f"Created complete preferences for user {user_id[:8]}... with {len(ALL_CATEGORIES)} categories")
     except Exception as e:
-        logger.error(f"Error updating preferences: {e}")
-
+        logger.exception(f"Unexpected error in feedback handler: {e}")
+        if not redirected:
+            send_redirect(request, f"{app_base}?error=server_error")
 
-# =============================================================================
-# HTTP Handler
-# =============================================================================
 
 class handler(BaseHTTPRequestHandler):
     """Vercel serverless function handler."""
@@ -331,56 +421,5 @@ class handler(BaseHTTPRequestHandler):
         """Override to use our logger."""
         logger.info("%s - %s", self.address_string(), format % args)
     
-    def send_error_response(self, status_code: int, message: str) -> None:
-        """Send a JSON error response."""
-        self.send_response(status_code)
-        self.send_header('Content-Type', 'application/json')
-        self.end_headers()
-        self.wfile.write(json.dumps({'error': message}).encode())
-    
-    def send_redirect(self, url: str) -> None:
-        """Send a redirect response."""
-        self.send_response(302)
-        self.send_header('Location', url)
-        self.end_headers()
-    
     def do_GET(self):
-        """Handle GET requests for feedback tracking."""
-        app_base = APP_URL.rstrip("/")
-        try:
-            # Parse query parameters
-            parsed = urlparse(self.path)
-            params = parse_qs(parsed.query)
-            
-            # Extract and validate parameters
-            try:
-                user_id = validate_user_id(params.get('uid', [None])[0])
-                event_id = validate_event_id(params.get('eid', [None])[0])
-                category = validate_category(params.get('cat', ['general'])[0])
-                action = validate_action(params.get('action', ['like'])[0])
-                email_sent_at = validate_timestamp(params.get('sent', [None])[0])
-            except ValidationError as e:
-                logger.warning(f"Validation error: {e}")
-                self.send_redirect(f"{app_base}?error=invalid_params")
-                return
-            
-            # Rate limiting check
-            if is_rate_limited(user_id):
-                self.send_error_response(429, "Too many requests. Please try again later.")
-                return
-            
-            # Store the interaction
-            store_interaction(user_id, event_id, action)
-            
-            # Update preferences if within decay window
-            if is_within_decay_window(email_sent_at):
-                update_preferences(user_id, category, action)
-            else:
-                logger.info(f"Skipping preference update: email older than {PREFERENCE_DECAY_DAYS} days")
-            
-            # Redirect to success page
-            self.send_redirect(app_base)
-            
-        except Exception as e:
-            logger.exception(f"Unexpected error in feedback handler: {e}")
-            self.send_redirect(f"{app_base}?error=server_error")
+        handle_get(self)
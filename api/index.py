@@ -0,0 +1,85 @@
+"""
+Vercel Serverless Function that serves every API route from one process.
+
+vercel.json routes feedback, signup and unsubscribe traffic here so a single
+warm instance (one Supabase connection pool, one rate-limit store) handles
+all of it, instead of three functions that each cold-start on their own.
+The endpoint logic itself stays in the per-route modules.
+"""
+
+from __future__ import annotations
+
+import sys
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from typing import Callable, Dict
+
+# Add parent directory to path for api/python_app imports in Vercel serverless
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from api import feedback, subscribe, unsubscribe
+from python_app.http_utils import send_body
+from python_app.supabase_client import warm_connection
+
+# A route's request handlers, keyed by HTTP method
+Endpoint = Dict[str, Callable[[BaseHTTPRequestHandler], None]]
+
+FEEDBACK: Endpoint = {"GET": feedback.handle_get}
+SUBSCRIBE: Endpoint = {"POST": subscribe.handle_post, "OPTIONS": subscribe.handle_options}
+UNSUBSCRIBE: Endpoint = {"GET": unsubscribe.handle_get}
+
+# Path prefix -> endpoint, checked in order
+ROUTES: tuple[tuple[str, Endpoint], ...] = (
+    ("/feedback", FEEDBACK),
+    ("/api/feedback", FEEDBACK),
+    ("/subscribe", SUBSCRIBE),
+    ("/api/subscribe", SUBSCRIBE),
+    ("/unsubscribe", UNSUBSCRIBE),
+    ("/api/unsubscribe", UNSUBSCRIBE),
+)
+
+
+def resolve_route(path: str) -> Endpoint | None:
+    """Return the endpoint for a request path, if any."""
+    route_path = path.partition("?")[0]
+    for prefix, endpoint in ROUTES:
+        if route_path == prefix or route_path.startswith(prefix + "/"):
+            return endpoint
+    return None
+
+
+# Set once this instance has opened its Supabase connection
+_warmed = False
+
+
+def _warm_once() -> None:
+    """Open the Supabase connection on the first request this instance serves.
+
+    Done lazily rather than at import so importing this module (tests,
+    tooling) never touches the network.
+    """
+    global _warmed
+    if not _warmed:
+        _warmed = True
+        warm_connection()
+
+
+class handler(BaseHTTPRequestHandler):
+    """Dispatch each request to the endpoint function for its path and method."""
+
+    def _dispatch(self) -> None:
+        endpoint = resolve_route(self.path)
+        if endpoint is None:
+            send_body(self, 404, b"Not found.", "text/plain; charset=utf-8")
+            return
+
+        handle = endpoint.get(self.command)
+        if handle is None:
+            self.send_error(405)
+            return
+        _warm_once()
+        handle(self)
+
+    do_GET = _dispatch
+    do_POST = _dispatch
+    do_OPTIONS = _dispatch
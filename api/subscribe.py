@@ -8,7 +8,6 @@ from __future__ import annotations
 import json
 import logging
 import os
-import re
 import sys
 from http.server import BaseHTTPRequestHandler
 from pathlib import Path
@@ -17,6 +16,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from python_app.categories import CONNECT3_CATEGORIES, UNIFORM_BASELINE
+from python_app.http_utils import read_json, send_body
 from python_app.supabase_client import supabase
 
 logger = logging.getLogger(__name__)
@@ -31,7 +31,30 @@ _PERMITTED_ORIGINS = {
     "https://connect3-newsletter.vercel.app",
 }
 
-EMAIL_PATTERN = re.compile(r"^[^\s@]+@[^\s@]+\.[^\s@]+$")
+EMAIL_MAX_LENGTH = 254  # RFC 5321 forward-path limit
+
+# Every response body is one of a fixed set, so encode them once at import
+_RESP_OK = json.dumps({"ok": True}).encode("utf-8")
+_RESP_RESUBSCRIBED = json.dumps({"ok": True, "resubscribed": True}).encode("utf-8")
+_RESP_NOT_CONFIGURED = json.dumps({"error": "Supabase not configured."}).encode("utf-8")
+_RESP_INVALID_JSON = json.dumps({"error": "Invalid JSON body."}).encode("utf-8")
+_RESP_MISSING_FIELDS = json.dumps({"error": "First name, last name, and email are required."}).encode("utf-8")
+_RESP_INVALID_EMAIL = json.dumps({"error": "Please provide a valid email address."}).encode("utf-8")
+_RESP_ALREADY_SUBSCRIBED = json.dumps({"error": "This email is already subscribed."}).encode("utf-8")
+_RESP_CHECK_FAILED = json.dumps({"error": "Unable to process your request right now."}).encode("utf-8")
+_RESP_SAVE_FAILED = json.dumps({"error": "Unable to save your details right now."}).encode("utf-8")
+
+
+def _is_valid_email(email: str) -> bool:
+    """Check local@domain.tld shape: one '@', a dot inside the domain, no whitespace."""
+    if len(email) > EMAIL_MAX_LENGTH:
+        return False
+    local, at, domain = email.partition("@")
+    if not local or not at or "@" in domain:
+        return False
+    if "." not in domain[1:-1]:
+        return False
+    return not any(ch.isspace() for ch in email)
 
 
 def _get_allowed_origin(handler: BaseHTTPRequestHandler) -> str:
@@ -46,125 +69,128 @@ def _get_allowed_origin(handler: BaseHTTPRequestHandler) -> str:
     return ""  # deny by omission — browser will block the response
 
 
-def _send_json(handler: BaseHTTPRequestHandler, status: int, payload: dict) -> None:
-    handler.send_response(status)
-    handler.send_header("Access-Control-Allow-Origin", _get_allowed_origin(handler))
-    handler.send_header("Access-Control-Allow-Methods", "POST, OPTIONS")
-    handler.send_header("Access-Control-Allow-Headers", "Content-Type")
-    handler.send_header("Vary", "Origin")
-    handler.send_header("Content-Type", "application/json; charset=utf-8")
-    handler.end_headers()
-    handler.wfile.write(json.dumps(payload).encode("utf-8"))
+def _cors_headers(handler: BaseHTTPRequestHandler) -> list[tuple[str, str]]:
+    return [
+        ("Access-Control-Allow-Origin", _get_allowed_origin(handler)),
+        ("Access-Control-Allow-Methods", "POST, OPTIONS"),
+        ("Access-Control-Allow-Headers", "Content-Type"),
+        ("Vary", "Origin"),
+    ]
 
 
-def _read_json(handler: BaseHTTPRequestHandler) -> dict | None:
-    content_length = int(handler.headers.get("Content-Length", "0"))
-    if content_length <= 0:
-        return None
-    raw = handler.rfile.read(content_length)
-    try:
-        return json.loads(raw.decode("utf-8"))
-    except json.JSONDecodeError:
-        return None
+def _send_json(handler: BaseHTTPRequestHandler, status: int, body: bytes) -> None:
+    send_body(
+        handler,
+        status,
+        body,
+        "application/json; charset=utf-8",
+        headers=_cors_headers(handler),
+    )
 
 
-class handler(BaseHTTPRequestHandler):
-    def do_OPTIONS(self):
-        self.send_response(204)
-        self.send_header("Access-Control-Allow-Origin", _get_allowed_origin(self))
-        self.send_header("Access-Control-Allow-Methods", "POST, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type")
-        self.send_header("Vary", "Origin")
-        self.end_headers()
+def handle_options(request: BaseHTTPRequestHandler) -> None:
+    """Answer the CORS preflight for the signup form."""
+    request.send_response(204)
+    for name, value in _cors_headers(request):
+        request.send_header(name, value)
+    request.end_headers()
 
-    def do_POST(self):
-        if not supabase:
-            _send_json(self, 500, {"error": "Supabase not configured."})
-            return
 
-        payload = _read_json(self)
-        if not isinstance(payload, dict):
-            _send_json(self, 400, {"error": "Invalid JSON body."})
-            return
+def handle_post(request: BaseHTTPRequestHandler) -> None:
+    """Register a newsletter signup (or reactivate an unsubscribed one)."""
+    if not supabase:
+        _send_json(request, 500, _RESP_NOT_CONFIGURED)
+        return
 
-        first_name = str(payload.get("firstName") or "").strip()
-        last_name = str(payload.get("lastName") or "").strip()
-        email = str(payload.get("email") or "").strip()
+    payload = read_json(request)
+    if not isinstance(payload, dict):
+        _send_json(request, 400, _RESP_INVALID_JSON)
+        return
 
-        if not first_name or not last_name or not email:
-            _send_json(
-                self,
-                400,
-                {"error": "First name, last name, and email are required."},
-            )
-            return
+    first_name = str(payload.get("firstName") or "").strip()
+    last_name = str(payload.get("lastName") or "").strip()
+    email = str(payload.get("email") or "").strip()
 
-        if not EMAIL_PATTERN.match(email):
-            _send_json(self, 400, {"error": "Please provide a valid email address."})
-            return
+    if not first_name or not last_name or not email:
+        _send_json(request, 400, _RESP_MISSING_FIELDS)
+        return
 
-        # Check for existing user with this email
-        try:
-            existing = (
-                supabase.table(USERS_TABLE)
-                .select("id, is_unsubscribed")
-                .eq("email", email)
-                .limit(1)
-                .execute()
-            )
-            if existing.data:
-                # User exists - check if they unsubscribed and want to resubscribe
-                if existing.data[0].get("is_unsubscribed"):
-                    # Reactivate the unsubscribed user
-                    supabase.table(USERS_TABLE).update({
-                        "is_unsubscribed": False,
-                        "unsubscribed_at": None,
-                        "name": f"{first_name} {last_name}".strip(),
-                    }).eq("id", existing.data[0]["id"]).execute()
-                    _send_json(self, 200, {"ok": True, "resubscribed": True})
-                    return
-                else:
-                    _send_json(self, 409, {"error": "This email is already subscribed."})
-                    return
-        except Exception as exc:
-            logger.error("Failed to check existing user: %s", exc)
-            _send_json(self, 500, {"error": "Unable to process your request right now."})
-            return
+    if not _is_valid_email(email):
+        _send_json(request, 400, _RESP_INVALID_EMAIL)
+        return
 
-        record = {
-            "first_name": first_name,
-            "last_name": last_name,
-            "email": email,
-            "is_new_recipient": True,
-            "is_unsubscribed": False,
-        }
-
-        try:
-            resp = supabase.table(USERS_TABLE).insert(record).execute()
-            # Check if response has data (successful insert)
-            if not resp.data:
-                # Log the full response for debugging
-                logger.error("Insert returned no data. Response: %s", resp)
-                _send_json(self, 500, {"error": "Unable to save your details right now."})
+    # Check for existing user with this email
+    try:
+        existing = (
+            supabase.table(USERS_TABLE)
+            .select("id, is_unsubscribed")
+            .eq("email", email)
+            .limit(1)
+            .execute()
+        )
+        if existing.data:
+            # User exists - check if they unsubscribed and want to resubscribe
+            if existing.data[0].get("is_unsubscribed"):
+                # Reactivate the unsubscribed user
+                supabase.table(USERS_TABLE).update({
+                    "is_unsubscribed": False,
+                    "unsubscribed_at": None,
+                    "name": f"{first_name} {last_name}".strip(),
+                }).eq("id", existing.data[0]["id"]).execute()
+                _send_json(request, 200, _RESP_RESUBSCRIBED)
+                return
+            else:
+                _send_json(request, 409, _RESP_ALREADY_SUBSCRIBED)
                 return
-            
-            # Get the new user's ID and create linked user_preferences record
-            new_user_id = resp.data[0].get("id")
-            if new_user_id:
-                try:
-                    # Create user_preferences with uniform baseline scores
-                    prefs_payload = {"subscriber_id": new_user_id}
-                    for category in CONNECT3_CATEGORIES:
-                        prefs_payload[category] = UNIFORM_BASELINE
-                    supabase.table("user_preferences").insert(prefs_payload).execute()
-                    logger.info("Created user_preferences for user: %s", new_user_id)
-                except Exception as pref_exc:
-                    logger.warning("Could not create user_preferences: %s", pref_exc)
-            
-            logger.info("Successfully inserted user: %s", email)
-        except Exception as exc:
-            logger.error("Signup failed with exception: %s", exc)
-            _send_json(self, 500, {"error": "Unable to save your details right now."})
+    except Exception as exc:
+        logger.error("Failed to check existing user: %s", exc)
+        _send_json(request, 500, _RESP_CHECK_FAILED)
+        return
+
+    record = {
+        "first_name": first_name,
+        "last_name": last_name,
+        "email": email,
+        "is_new_recipient": True,
+        "is_unsubscribed": False,
+    }
+
+    try:
+        resp = supabase.table(USERS_TABLE).insert(record).execute()
+        # Check if response has data (successful insert)
+        if not resp.data:
+            # Log the full response for debugging
+            logger.error("Insert returned no data. Response: %s", resp)
+            _send_json(request, 500, _RESP_SAVE_FAILED)
             return
+        
+        # Get the new user's ID and create linked user_preferences record
+        new_user_id = resp.data[0].get("id")
+        if new_user_id:
+            try:
+                # Create user_preferences with uniform baseline scores
+                prefs_payload = {"subscriber_id": new_user_id}
+                for category in CONNECT3_CATEGORIES:
+                    prefs_payload[category] = UNIFORM_BASELINE
+                supabase.table("user_preferences").upsert(
+                    prefs_payload, on_conflict="subscriber_id", ignore_duplicates=True
+                ).execute()
+                logger.info("Created user_preferences for user: %s", new_user_id)
+            except Exception as pref_exc:
+                logger.warning("Could not create user_preferences: %s", pref_exc)
+        
+        logger.info("Successfully inserted user: %s", email)
+    except Exception as exc:
+        logger.error("Signup failed with exception: %s", exc)
+        _send_json(request, 500, _RESP_SAVE_FAILED)
+        return
+
+    _send_json(request, 200, _RESP_OK)
 
-        _send_json(self, 200, {"ok": True})
+
+class handler(BaseHTTPRequestHandler):
+    def do_OPTIONS(self):
+        handle_options(self)
+
+    def do_POST(self):
+        handle_post(self)
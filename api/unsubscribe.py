@@ -3,7 +3,6 @@ Vercel Serverless Function for email unsubscribe.
 Marks a user as unsubscribed and returns a confirmation page or redirects.
 """
 
-import hashlib
 import hmac
 import logging
 import os
@@ -11,97 +10,25 @@ import sys
 from datetime import datetime, timezone
 from http.server import BaseHTTPRequestHandler
 from pathlib import Path
-from urllib.parse import parse_qs, urlparse
 
 # Add parent directory to path for python_app imports in Vercel serverless
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
+from python_app.http_utils import parse_query, send_body, send_redirect
 from python_app.supabase_client import supabase
+from python_app.unsubscribe_tokens import unsubscribe_token as _expected_token
 
 logger = logging.getLogger(__name__)
 
 UNSUBSCRIBE_TOKEN_SECRET = os.environ.get("UNSUBSCRIBE_TOKEN_SECRET")
 UNSUBSCRIBE_REDIRECT_URL = os.environ.get("NEXT_PUBLIC_SITE_URL") or os.environ.get("NEXT_PUBLIC_APP_URL")
 
-
-def _expected_token(user_id: str, secret: str) -> str:
-    mac = hmac.new(secret.encode("utf-8"), user_id.encode("utf-8"), hashlib.sha256)
-    return mac.hexdigest()
-
-
-def _is_valid_token(user_id: str, token: str, secret: str) -> bool:
-    if not token:
-        return False
-    return hmac.compare_digest(_expected_token(user_id, secret), token)
-
-
-def _send_plain(handler: BaseHTTPRequestHandler, status: int, message: str) -> None:
-    handler.send_response(status)
-    handler.send_header("Content-Type", "text/plain; charset=utf-8")
-    handler.end_headers()
-    handler.wfile.write(message.encode("utf-8"))
-
-
-def _send_html(handler: BaseHTTPRequestHandler, status: int, html: str) -> None:
-    handler.send_response(status)
-    handler.send_header("Content-Type", "text/html; charset=utf-8")
-    handler.end_headers()
-    handler.wfile.write(html.encode("utf-8"))
-
-
-class handler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        parsed = urlparse(self.path)
-        params = parse_qs(parsed.query)
-
-        user_id = params.get("uid", [None])[0]
-        token = params.get("token", [None])[0]
-
-        if not user_id:
-            _send_plain(self, 400, "Missing uid.")
-            return
-
-        # Security: Token validation is mandatory - never skip
-        if not UNSUBSCRIBE_TOKEN_SECRET:
-            logger.error("CRITICAL: UNSUBSCRIBE_TOKEN_SECRET not configured - rejecting request")
-            _send_plain(self, 500, "An error occurred. Please try again later.")
-            return
-        
-        if not _is_valid_token(user_id, token, UNSUBSCRIBE_TOKEN_SECRET):
-            logger.warning(f"Invalid unsubscribe token attempt for user: {user_id[:8] if user_id else 'unknown'}...")
-            _send_plain(self, 403, "Invalid or missing token.")
-            return
-
-        if not supabase:
-            _send_plain(self, 500, "Supabase not configured.")
-            return
-
-        try:
-            payload = {
-                "is_unsubscribed": True,
-                "unsubscribed_at": datetime.now(timezone.utc).isoformat(),
-            }
-            # Update both tables: subscribers is the source of truth for
-            # newsletter delivery; profiles stores profile-level state.
-            supabase.table("subscribers").update(payload).eq("id", user_id).execute()
-            # Also update profiles (best-effort) so the state is consistent
-            try:
-                supabase.table("profiles").update(payload).eq("id", user_id).execute()
-            except Exception:
-                # Non-critical — subscribers table is authoritative
-                logger.debug("Could not update profiles table for user %s", user_id)
-        except Exception as exc:
-            logger.error(f"Unsubscribe failed for user {user_id}: {exc}")
-            _send_plain(self, 500, "An error occurred. Please try again later.")
-            return
-
-        if UNSUBSCRIBE_REDIRECT_URL:
-            self.send_response(302)
-            self.send_header("Location", UNSUBSCRIBE_REDIRECT_URL)
-            self.end_headers()
-            return
-
-        html = """
+# Response bodies are fixed, so encode them once at import
+_MSG_MISSING_UID = b"Missing uid."
+_MSG_SERVER_ERROR = b"An error occurred. Please try again later."
+_MSG_INVALID_TOKEN = b"Invalid or missing token."
+_MSG_NOT_CONFIGURED = b"Supabase not configured."
+_CONFIRM_HTML = """
 <!doctype html>
 <html lang="en">
   <head>
@@ -116,5 +43,81 @@ class handler(BaseHTTPRequestHandler):
     </div>
   </body>
 </html>
-        """
-        _send_html(self, 200, html.strip())
+""".strip().encode("utf-8")
+
+# Tokens are lowercase hex SHA-256 digests
+TOKEN_HEX_LENGTH = 64
+TOKEN_HEX_CHARS = frozenset("0123456789abcdef")
+
+
+def _is_valid_token(user_id: str, token: str, secret: str) -> bool:
+    # Reject malformed tokens before hashing; this depends only on the
+    # (public) shape of the input, never on the secret or expected digest.
+    if not token or len(token) != TOKEN_HEX_LENGTH or not TOKEN_HEX_CHARS.issuperset(token):
+        return False
+    return hmac.compare_digest(_expected_token(user_id, secret), token)
+
+
+def _send_plain(handler: BaseHTTPRequestHandler, status: int, message: bytes) -> None:
+    send_body(handler, status, message, "text/plain; charset=utf-8")
+
+
+def _send_html(handler: BaseHTTPRequestHandler, status: int, html: bytes) -> None:
+    send_body(handler, status, html, "text/html; charset=utf-8")
+
+
+def handle_get(request: BaseHTTPRequestHandler) -> None:
+    """Verify the signed link and mark the subscriber as unsubscribed."""
+    params = parse_query(request.path)
+
+    user_id = params.get("uid")
+    token = params.get("token")
+
+    if not user_id:
+        _send_plain(request, 400, _MSG_MISSING_UID)
+        return
+
+    # Security: Token validation is mandatory - never skip
+    if not UNSUBSCRIBE_TOKEN_SECRET:
+        logger.error("CRITICAL: UNSUBSCRIBE_TOKEN_SECRET not configured - rejecting request")
+        _send_plain(request, 500, _MSG_SERVER_ERROR)
+        return
+    
+    if not _is_valid_token(user_id, token, UNSUBSCRIBE_TOKEN_SECRET):
+        logger.warning(f"Invalid unsubscribe token attempt for user: {user_id[:8] if user_id else 'unknown'}...")
+        _send_plain(request, 403, _MSG_INVALID_TOKEN)
+        return
+
+    if not supabase:
+        _send_plain(request, 500, _MSG_NOT_CONFIGURED)
+        return
+
+    try:
+        payload = {
+            "is_unsubscribed": True,
+            "unsubscribed_at": datetime.now(timezone.utc).isoformat(),
+        }
+        # Update both tables: subscribers is the source of truth for
+        # newsletter delivery; profiles stores profile-level state.
+        supabase.table("subscribers").update(payload).eq("id", user_id).execute()
+        # Also update profiles (best-effort) so the state is consistent
+        try:
+            supabase.table("profiles").update(payload).eq("id", user_id).execute()
+        except Exception:
+            # Non-critical — subscribers table is authoritative
+            logger.debug("Could not update profiles table for user %s", user_id)
+    except Exception as exc:
+        logger.error(f"Unsubscribe failed for user {user_id}: {exc}")
+        _send_plain(request, 500, _MSG_SERVER_ERROR)
+        return
+
+    if UNSUBSCRIBE_REDIRECT_URL:
+        send_redirect(request, UNSUBSCRIBE_REDIRECT_URL)
+        return
+
+    _send_html(request, 200, _CONFIRM_HTML)
+
+
+class handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        handle_get(self)
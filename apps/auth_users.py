@@ -1,12 +1,17 @@
 """Helpers for accessing Supabase auth.users data via the Admin API."""
 
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 
 from .logger import get_logger
 from .supabase_client import supabase
 
 logger = get_logger(__name__)
 
+# Concurrent get_user_by_id calls in fetch_auth_emails (the Admin API has no
+# bulk lookup, so each id is its own HTTPS round trip)
+AUTH_LOOKUP_WORKERS = 20
+
 
 def _auth_admin():
     """Return the Supabase Auth Admin client if available."""
@@ -14,33 +19,51 @@ def _auth_admin():
     return getattr(auth, "admin", None) if auth else None
 
 
+# The client is a module-level singleton, so its admin handle is resolved once
+_ADMIN = _auth_admin()
+
+
+def auth_admin_available() -> bool:
+    """Whether the Supabase Auth Admin API can be used (requires the service key)."""
+    return _ADMIN is not None
+
+
+def _email_from_response(resp: Any) -> Optional[str]:
+    user = getattr(resp, "user", None)
+    if user is None and isinstance(resp, dict):
+        user = resp.get("user")
+    if not user:
+        return None
+    return getattr(user, "email", None) if not isinstance(user, dict) else user.get("email")
+
+
 def fetch_auth_emails(user_ids: List[str]) -> Dict[str, str]:
     """Batch fetch auth emails keyed by user id."""
     if not user_ids:
         return {}
 
-    admin = _auth_admin()
+    admin = _ADMIN
     if not admin:
         logger.warning("Supabase auth admin client not available; cannot fetch auth emails.")
         return {}
 
-    emails: Dict[str, str] = {}
-    for user_id in user_ids:
-        if not user_id:
-            continue
+    def _lookup(user_id: str) -> Optional[str]:
         try:
             resp = admin.get_user_by_id(user_id)
         except Exception as exc:
             logger.warning(f"Failed to fetch auth email for user {user_id}: {exc}")
-            continue
-        user = getattr(resp, "user", None)
-        if user is None and isinstance(resp, dict):
-            user = resp.get("user")
-        if not user:
-            continue
-        email = getattr(user, "email", None) if not isinstance(user, dict) else user.get("email")
-        if email:
-            emails[str(user_id)] = email
+            return None
+        return _email_from_response(resp)
+
+    ids = list(dict.fromkeys(user_id for user_id in user_ids if user_id))
+    if not ids:
+        return {}
+
+    emails: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=min(AUTH_LOOKUP_WORKERS, len(ids))) as pool:
+        for user_id, email in zip(ids, pool.map(_lookup, ids)):
+            if email:
+                emails[str(user_id)] = email
     return emails
 
 
@@ -49,7 +72,7 @@ def fetch_auth_email(user_id: str) -> Optional[str]:
     if not user_id:
         return None
 
-    admin = _auth_admin()
+    admin = _ADMIN
     if not admin:
         logger.warning("Supabase auth admin client not available; cannot fetch auth email.")
         return None
@@ -60,9 +83,4 @@ def fetch_auth_email(user_id: str) -> Optional[str]:
         logger.warning(f"Failed to fetch auth email for user {user_id}: {exc}")
         return None
 
-    user = getattr(resp, "user", None)
-    if user is None and isinstance(resp, dict):
-        user = resp.get("user")
-    if not user:
-        return None
-    return getattr(user, "email", None) if not isinstance(user, dict) else user.get("email")
+    return _email_from_response(resp)
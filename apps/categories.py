@@ -29,6 +29,10 @@ CONNECT3_CATEGORIES: List[str] = [
 # Set version for O(1) lookups
 CONNECT3_CATEGORIES_SET: FrozenSet[str] = frozenset(CONNECT3_CATEGORIES)
 
+# Comma-separated column list for selecting only the category scores
+# from user_preferences
+CATEGORY_SELECT_COLUMNS: str = ",".join(CONNECT3_CATEGORIES)
+
 # Number of categories (used for uniform baseline calculations)
 NUM_CATEGORIES: int = len(CONNECT3_CATEGORIES)
 
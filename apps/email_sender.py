@@ -1,12 +1,21 @@
 """Email delivery via Gmail SMTP for Connect3 newsletters."""
 
 import smtplib
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 from email.message import EmailMessage
-from typing import Any, Dict, List, Mapping
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, TypeVar
 
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import (
+  retry,
+  retry_if_exception_type,
+  retry_if_not_exception_type,
+  stop_after_attempt,
+  wait_exponential,
+  wait_random,
+)
 
 from .subscribers import fetch_subscriber_email
 from .config import get_env
@@ -24,49 +33,198 @@ FROM_EMAIL = SENDER_EMAIL or GMAIL_USER or "noreply@example.com"
 SITE_URL = get_env("NEXT_PUBLIC_SITE_URL") or get_env("NEXT_PUBLIC_APP_URL") or "https://connect3-newsletter.vercel.app"
 FEEDBACK_URL = f"{SITE_URL.rstrip('/')}/feedback"
 SMTP_TIMEOUT_SEC = max(1, int(get_env("SMTP_TIMEOUT_SEC", "30") or "30"))
+# Probe a session with NOOP before reusing it after this many idle seconds
+SMTP_IDLE_CHECK_SEC = 30
+# Rows per email_logs insert when logs are written in bulk
+EMAIL_LOG_BATCH_SIZE = 500
+# Concurrent SMTP connections used by send_newsletters (keep well under Gmail's limits)
+EMAIL_SEND_WORKERS = max(1, int(get_env("EMAIL_SEND_WORKERS", "4") or "4"))
+
+
+def _build_message(to_email: str, subject: str, html: str) -> EmailMessage:
+  msg = EmailMessage()
+  msg["From"] = FROM_EMAIL
+  msg["To"] = to_email
+  msg["Subject"] = subject
+  msg.set_content("HTML email requires an HTML-capable client.")
+  msg.add_alternative(html, subtype="html")
+  return msg
+
+
+class SMTPSession:
+  """
+  One authenticated Gmail connection reused across a batch of sends.
+
+  Connects lazily on the first message, checks an idle connection with NOOP
+  before reusing it, and drops the connection after any SMTP/network error,
+  so a retried send reconnects instead of reusing a broken session.
+  """
+
+  def __init__(self) -> None:
+    self._smtp: Optional[smtplib.SMTP_SSL] = None
+    self._last_used = 0.0
+
+  def __enter__(self) -> "SMTPSession":
+    return self
 
+  def __exit__(self, exc_type, exc, tb) -> bool:
+    self.close()
+    return False
 
+  def _connect(self) -> smtplib.SMTP_SSL:
+    smtp = smtplib.SMTP_SSL("smtp.gmail.com", 465, timeout=SMTP_TIMEOUT_SEC)
+    try:
+      smtp.login(GMAIL_USER, GMAIL_APP_PASSWORD)
+    except Exception:
+      smtp.close()
+      raise
+    return smtp
+
+  def _is_alive(self) -> bool:
+    try:
+      return self._smtp.noop()[0] == 250
+    except (smtplib.SMTPException, OSError):
+      return False
+
+  def send_message(self, msg: EmailMessage) -> None:
+    # Gmail drops idle sessions; a cheap NOOP avoids a failed send + backoff
+    if self._smtp is not None and time.monotonic() - self._last_used > SMTP_IDLE_CHECK_SEC:
+      if not self._is_alive():
+        self.close()
+    if self._smtp is None:
+      self._smtp = self._connect()
+    try:
+      self._smtp.send_message(msg)
+    except (smtplib.SMTPException, OSError):
+      self.close()
+      raise
+    self._last_used = time.monotonic()
+
+  def close(self) -> None:
+    smtp, self._smtp = self._smtp, None
+    if smtp is None:
+      return
+    try:
+      smtp.quit()
+    except (smtplib.SMTPException, OSError):
+      smtp.close()
+
+
+# Jitter spreads retries from concurrent senders; bad credentials are not
+# transient, so they fail immediately instead of burning login attempts.
 @retry(
   stop=stop_after_attempt(3),
-  wait=wait_exponential(multiplier=1, min=2, max=10),
-  retry=retry_if_exception_type((smtplib.SMTPException, OSError)),
+  wait=wait_exponential(multiplier=1, min=2, max=10) + wait_random(0, 1),
+  retry=(
+    retry_if_exception_type((smtplib.SMTPException, OSError))
+    & retry_if_not_exception_type(smtplib.SMTPAuthenticationError)
+  ),
   reraise=True
 )
-def send_email(to_email: str, subject: str, html: str) -> None:
+def send_email(to_email: str, subject: str, html: str, session: Optional[SMTPSession] = None) -> None:
   if not GMAIL_USER or not GMAIL_APP_PASSWORD:
     raise RuntimeError("Gmail not configured. Set GMAIL_USER and GMAIL_APP_PASSWORD to send emails.")
 
-  msg = EmailMessage()
-  msg["From"] = FROM_EMAIL
-  msg["To"] = to_email
-  msg["Subject"] = subject
-  msg.set_content("HTML email requires an HTML-capable client.")
-  msg.add_alternative(html, subtype="html")
+  msg = _build_message(to_email, subject, html)
+
+  # Bulk senders pass a shared session to skip the TLS handshake and login
+  if session is not None:
+    session.send_message(msg)
+    return
 
   with smtplib.SMTP_SSL("smtp.gmail.com", 465, timeout=SMTP_TIMEOUT_SEC) as smtp:
     smtp.login(GMAIL_USER, GMAIL_APP_PASSWORD)
     smtp.send_message(msg)
 
 
+def insert_email_logs(rows: List[Dict[str, Any]]) -> None:
+  """Write email_logs rows in chunked bulk inserts (best effort; failures are logged)."""
+  for start in range(0, len(rows), EMAIL_LOG_BATCH_SIZE):
+    batch = rows[start:start + EMAIL_LOG_BATCH_SIZE]
+    try:
+      resp = supabase.table("email_logs").insert(batch).execute()
+      ensure_ok(resp, action="insert email_logs")
+    except Exception as exc:
+      logger.warning(f"Failed to write {len(batch)} email_logs rows: {exc}")
+
+
+T = TypeVar("T")
+
+
+def send_concurrently(items: Iterable[T], send: Callable[[T, SMTPSession], None], label: Callable[[T], str] = str) -> Tuple[int, int]:
+  """
+  Call send(item, session) for every item on a small thread pool.
+
+  SMTP is I/O-bound, so sends overlap. Each worker thread gets its own
+  SMTPSession (smtplib connections are not thread-safe), and every session
+  is closed before this returns. Failures are logged per item, not raised.
+
+  Returns:
+      (sent, failed) counts.
+  """
+  local = threading.local()
+  sessions: List[SMTPSession] = []
+  sessions_lock = threading.Lock()
+
+  def _send_with_thread_session(item: T) -> None:
+    session = getattr(local, "session", None)
+    if session is None:
+      session = local.session = SMTPSession()
+      with sessions_lock:
+        sessions.append(session)
+    send(item, session)
+
+  sent = 0
+  failed = 0
+  try:
+    with ThreadPoolExecutor(max_workers=EMAIL_SEND_WORKERS) as pool:
+      futures = {pool.submit(_send_with_thread_session, item): item for item in items}
+      for future in as_completed(futures):
+        try:
+          future.result()
+          sent += 1
+        except Exception as exc:
+          logger.error(f"Failed to send email to {label(futures[future])}: {exc}")
+          failed += 1
+  finally:
+    for session in sessions:
+      session.close()
+  return sent, failed
+
+
 class EmailDeliveryService:
   """Handles newsletter delivery and logging, mirroring the TS implementation."""
 
   def send_newsletters(self, ranked_events_by_user: Mapping[str, List[Dict[str, Any]]]) -> None:
-    success = 0
-    failed = 0
-
-    for user_id, events in ranked_events_by_user.items():
-      try:
-        self.send_personalized_email(user_id, events)
-        success += 1
-        time.sleep(0.1)
-      except Exception as exc:
-        logger.error(f"Failed to send email to user {user_id}: {exc}")
-        failed += 1
+    log_rows: List[Dict[str, Any]] = []
+
+    def _send(item: Tuple[str, List[Dict[str, Any]]], session: SMTPSession) -> None:
+      user_id, events = item
+      self.send_personalized_email(user_id, events, session=session, log_rows=log_rows)
+      time.sleep(0.1)
+
+    try:
+      success, failed = send_concurrently(
+        ranked_events_by_user.items(), _send, label=lambda item: f"user {item[0]}"
+      )
+    finally:
+      insert_email_logs(log_rows)
 
     logger.info(f"Email delivery complete: {success} sent, {failed} failed")
 
-  def send_personalized_email(self, user_id: str, events: List[Dict[str, Any]]) -> None:
+  def send_personalized_email(
+    self,
+    user_id: str,
+    events: List[Dict[str, Any]],
+    session: Optional[SMTPSession] = None,
+    log_rows: Optional[List[Dict[str, Any]]] = None,
+  ) -> None:
+    """
+    Render and send one user's newsletter.
+
+    When log_rows is given the email_logs row is appended to it for a later
+    bulk insert; otherwise it is written immediately.
+    """
     user_resp = supabase.table("profiles").select("*").eq("id", user_id).limit(1).execute()
     ensure_ok(user_resp, action="select profiles")
     user = user_resp.data[0] if user_resp.data else None
@@ -91,26 +249,26 @@ class EmailDeliveryService:
     subject = f"Your Weekly Event Picks - {len(events)} Events Curated For You"
 
     try:
-      send_email(user_email, subject, html)
-      log_resp = supabase.table("email_logs").insert({
-        "user_id": user_id,
-        "status": "sent",
-        "sent_at": datetime.now(timezone.utc).isoformat(),
-      }).execute()
-      try:
-        ensure_ok(log_resp, action="insert email_logs (sent)")
-      except Exception as log_exc:
-        logger.warning(f"Failed to log email success for user {user_id}: {log_exc}")
-      logger.info(f"Email sent successfully to {user_email}")
+      send_email(user_email, subject, html, session=session)
     except Exception as exc:
-      log_resp = supabase.table("email_logs").insert({
+      self._record_log({
         "user_id": user_id,
         "status": "failed",
         "error_message": str(exc),
         "sent_at": datetime.now(timezone.utc).isoformat(),
-      }).execute()
-      try:
-        ensure_ok(log_resp, action="insert email_logs (failed)")
-      except Exception as log_exc:
-        logger.warning(f"Failed to log email failure for user {user_id}: {log_exc}")
+      }, log_rows)
       raise
+
+    self._record_log({
+      "user_id": user_id,
+      "status": "sent",
+      "sent_at": datetime.now(timezone.utc).isoformat(),
+    }, log_rows)
+    logger.info(f"Email sent successfully to {user_email}")
+
+  @staticmethod
+  def _record_log(row: Dict[str, Any], log_rows: Optional[List[Dict[str, Any]]]) -> None:
+    if log_rows is not None:
+      log_rows.append(row)
+    else:
+      insert_email_logs([row])
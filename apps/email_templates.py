@@ -1,28 +1,112 @@
 """Simple HTML email templates for Connect3 newsletters."""
 
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 from urllib.parse import quote, urlparse
-import hashlib
-import hmac
 import html
 
 from .config import get_env
+from .unsubscribe_tokens import unsubscribe_token as _expected_unsubscribe_token
 
 
 UNSUBSCRIBE_TOKEN_SECRET = get_env("UNSUBSCRIBE_TOKEN_SECRET")
 DEFAULT_BANNER_URL = "https://nsjrzxbtxsqmsdgevszv.supabase.co/storage/v1/object/public/newsletter-assets/banner1.png"
 
 
+# Static document head (styles) and closing markup, shared by every email
+_EMAIL_HEAD = """
+<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <style>
+    body, table, td, a {
+      -webkit-text-size-adjust: 100%;
+      -ms-text-size-adjust: 100%;
+    }
+    table {
+      border-collapse: collapse;
+    }
+    .card-table {
+      border-collapse: separate !important;
+      border-spacing: 0 !important;
+    }
+    img {
+      border: 0;
+      height: auto;
+      line-height: 100%;
+      outline: none;
+      text-decoration: none;
+      -ms-interpolation-mode: bicubic;
+    }
+    .banner-img {
+      width: 100%;
+      max-width: 640px;
+      height: auto;
+      display: block;
+    }
+    @media only screen and (max-width: 600px) {
+      .container {
+        width: 100% !important;
+      }
+      .content {
+        padding: 12px !important;
+      }
+      .header {
+        padding: 0 !important;
+      }
+      .header h1 {
+        font-size: 24px !important;
+      }
+      .header p {
+        font-size: 14px !important;
+      }
+      .banner-img {
+        width: 100% !important;
+        max-width: 100% !important;
+        height: auto !important;
+      }
+      .card {
+        padding: 12px !important;
+      }
+      .card h3 {
+        font-size: 16px !important;
+      }
+      .button {
+        display: block !important;
+        width: 100% !important;
+        margin: 8px 0 !important;
+        text-align: center !important;
+        box-sizing: border-box !important;
+      }
+    }
+  </style>
+</head>
+"""
+
+_EMAIL_TAIL = """            </td>
+          </tr>
+        </table>
+      </td>
+    </tr>
+  </table>
+</body>
+</html>
+  """
+
+
 def format_category(category: Optional[str]) -> str:
   if not category:
     return "General"
   return " ".join(word.capitalize() for word in category.split("_"))
 
 
-def _expected_unsubscribe_token(user_id: str, secret: str) -> str:
-  mac = hmac.new(secret.encode("utf-8"), user_id.encode("utf-8"), hashlib.sha256)
-  return mac.hexdigest()
+@lru_cache(maxsize=64)
+def _category_label_html(category: Optional[str]) -> str:
+  # Only a handful of categories exist, so each label is formatted once
+  return html.escape(format_category(category))
 
 
 def _tracking_base_from_feedback_url(feedback_base_url: str) -> str:
@@ -82,7 +166,7 @@ def _parse_event_datetime(value: Any) -> Optional[datetime]:
     return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
   if isinstance(value, str):
     try:
-      parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+      parsed = datetime.fromisoformat(value)
     except Exception:
       return None
     if parsed.tzinfo is None:
@@ -91,7 +175,7 @@ def _parse_event_datetime(value: Any) -> Optional[datetime]:
   return None
 
 
-def _event_time_range(evt: Dict[str, Any]) -> tuple[Optional[datetime], Optional[datetime], Optional[str], Optional[str]]:
+def _event_time_raw(evt: Dict[str, Any]) -> tuple[Any, Any]:
   start_raw = (
     evt.get("start")
     or evt.get("event_date")
@@ -100,7 +184,29 @@ def _event_time_range(evt: Dict[str, Any]) -> tuple[Optional[datetime], Optional
     or evt.get("created_at")
   )
   end_raw = evt.get("end") or evt.get("end_time") or evt.get("end_date")
-  return _parse_event_datetime(start_raw), _parse_event_datetime(end_raw), start_raw, end_raw
+  return start_raw, end_raw
+
+
+@lru_cache(maxsize=1024)
+def _when_html(start_raw: Any, end_raw: Any) -> str:
+  """Escaped date line for a card; the same event recurs across every recipient's email."""
+  start_dt = _parse_event_datetime(start_raw)
+  end_dt = _parse_event_datetime(end_raw)
+  if start_dt and end_dt:
+    if start_dt.date() == end_dt.date():
+      when_str = f"{start_dt.strftime('%B %d, %Y at %I:%M %p')} - {end_dt.strftime('%I:%M %p')}"
+    else:
+      when_str = f"{start_dt.strftime('%B %d, %Y at %I:%M %p')} - {end_dt.strftime('%B %d, %Y at %I:%M %p')}"
+  elif start_dt:
+    when_str = start_dt.strftime("%B %d, %Y at %I:%M %p")
+  elif end_dt:
+    when_str = end_dt.strftime("%B %d, %Y at %I:%M %p")
+  else:
+    when_str = start_raw or end_raw or ""
+  if not when_str:
+    when_str = "TBA"
+  # Unparseable dates fall through as raw strings, so escape like other fields
+  return html.escape(str(when_str))
 
 
 def _event_location(evt: Dict[str, Any]) -> str:
@@ -118,6 +224,8 @@ def generate_personalized_email(user: Dict[str, Any], events: List[Dict[str, Any
   
   # Capture email send timestamp for time decay tracking
   email_sent_at = datetime.now(timezone.utc).isoformat()
+  # Include sent timestamp for 15-day time decay enforcement
+  sent_param = quote(email_sent_at)
 
   tracking_base = _tracking_base_from_feedback_url(feedback_base_url)
   banner_url = get_env("NEWSLETTER_BANNER_URL") or DEFAULT_BANNER_URL
@@ -128,6 +236,8 @@ def generate_personalized_email(user: Dict[str, Any], events: List[Dict[str, Any
     if full_name:
       first_name = full_name.split(" ", 1)[0]
   greeting_name = first_name or _normalize_text(user.get("email")) or "there"
+  # Per-user part of every tracking link; only event/category/action vary per card
+  feedback_prefix = f"{tracking_base}/feedback?uid={user_id}"
 
   unsubscribe_html = ""
   if user_id:
@@ -154,30 +264,14 @@ def generate_personalized_email(user: Dict[str, Any], events: List[Dict[str, Any
         'border-radius: 8px; display:block; margin-bottom: 10px; border:0; outline:none; text-decoration:none;" />'
       )
     
-    when_str = ""
-    start_dt, end_dt, start_raw, end_raw = _event_time_range(evt)
-    if start_dt and end_dt:
-      if start_dt.date() == end_dt.date():
-        when_str = f"{start_dt.strftime('%B %d, %Y at %I:%M %p')} - {end_dt.strftime('%I:%M %p')}"
-      else:
-        when_str = f"{start_dt.strftime('%B %d, %Y at %I:%M %p')} - {end_dt.strftime('%B %d, %Y at %I:%M %p')}"
-    elif start_dt:
-      when_str = start_dt.strftime("%B %d, %Y at %I:%M %p")
-    elif end_dt:
-      when_str = end_dt.strftime("%B %d, %Y at %I:%M %p")
-    else:
-      when_str = start_raw or end_raw or ""
-    if not when_str:
-      when_str = "TBA"
+    when_str = _when_html(*_event_time_raw(evt))
     
     # Build tracking URLs - goes to tracking API which stores click then redirects to connect3.app
     # Recommender returns 'event_id', all_posts.json uses 'id'
     event_id = evt.get('event_id') or evt.get('id') or 'unknown'
     category = evt.get('category') or 'general'
     # Tracking API stores the interaction then redirects to clean connect3.app URL
-    # Include sent timestamp for 15-day time decay enforcement
-    sent_param = quote(email_sent_at)
-    like_url = f"{tracking_base}/feedback?uid={user_id}&eid={event_id}&cat={category}&action=like&sent={sent_param}"
+    like_url = f"{feedback_prefix}&eid={event_id}&cat={category}&action=like&sent={sent_param}"
 
     group_title = evt.get("group_title")
     group_action_label = evt.get("group_action_label")
@@ -188,7 +282,7 @@ def generate_personalized_email(user: Dict[str, Any], events: List[Dict[str, Any
       action_html = ""
       if group_action_label:
         dislike_url = (
-          f"{tracking_base}/feedback?uid={user_id}&eid={group_action_event_id}"
+          f"{feedback_prefix}&eid={group_action_event_id}"
           f"&cat={group_action_category}&action=dislike&sent={sent_param}"
         )
         action_html = (
@@ -228,7 +322,7 @@ def generate_personalized_email(user: Dict[str, Any], events: List[Dict[str, Any
                 <span style="font-weight:600; font-size:13px; line-height:18px;">Where:</span>
                 <span style="font-size:13px; line-height:18px;"> {location}</span><br>
                 <span style="font-weight:600; font-size:13px; line-height:18px;">Category:</span>
-                <span style="font-size:13px; line-height:18px;"> {format_category(evt.get('category'))}</span>
+                <span style="font-size:13px; line-height:18px;"> {_category_label_html(evt.get('category'))}</span>
               </p>
             </a>
           </td>
@@ -243,76 +337,7 @@ def generate_personalized_email(user: Dict[str, Any], events: List[Dict[str, Any
     )
 
 
-  return f"""
-<!DOCTYPE html>
-<html>
-<head>
-  <meta charset="utf-8">
-  <meta name="viewport" content="width=device-width, initial-scale=1.0">
-  <style>
-    body, table, td, a {{
-      -webkit-text-size-adjust: 100%;
-      -ms-text-size-adjust: 100%;
-    }}
-    table {{
-      border-collapse: collapse;
-    }}
-    .card-table {{
-      border-collapse: separate !important;
-      border-spacing: 0 !important;
-    }}
-    img {{
-      border: 0;
-      height: auto;
-      line-height: 100%;
-      outline: none;
-      text-decoration: none;
-      -ms-interpolation-mode: bicubic;
-    }}
-    .banner-img {{
-      width: 100%;
-      max-width: 640px;
-      height: auto;
-      display: block;
-    }}
-    @media only screen and (max-width: 600px) {{
-      .container {{
-        width: 100% !important;
-      }}
-      .content {{
-        padding: 12px !important;
-      }}
-      .header {{
-        padding: 0 !important;
-      }}
-      .header h1 {{
-        font-size: 24px !important;
-      }}
-      .header p {{
-        font-size: 14px !important;
-      }}
-      .banner-img {{
-        width: 100% !important;
-        max-width: 100% !important;
-        height: auto !important;
-      }}
-      .card {{
-        padding: 12px !important;
-      }}
-      .card h3 {{
-        font-size: 16px !important;
-      }}
-      .button {{
-        display: block !important;
-        width: 100% !important;
-        margin: 8px 0 !important;
-        text-align: center !important;
-        box-sizing: border-box !important;
-      }}
-    }}
-  </style>
-</head>
-<body style="margin:0; padding:0; background:#ffffff; font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; width:100%;">
+  return _EMAIL_HEAD + f"""<body style="margin:0; padding:0; background:#ffffff; font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; width:100%;">
   <div style="display:none; font-size:1px; line-height:1px; max-height:0; max-width:0; opacity:0; overflow:hidden;">
     {len(events)} curated events just for you this week
   </div>
@@ -355,12 +380,4 @@ def generate_personalized_email(user: Dict[str, Any], events: List[Dict[str, Any
             <td style="background:#f9fafb; padding:16px; text-align:center; color:#6b7280; font-size:12px; font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;">
               <p style="margin:0;">Connect3 Newsletter</p>
               {unsubscribe_html}
-            </td>
-          </tr>
-        </table>
-      </td>
-    </tr>
-  </table>
-</body>
-</html>
-  """
+""" + _EMAIL_TAIL
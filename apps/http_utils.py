@@ -0,0 +1,75 @@
+"""Request/response helpers shared by the api/ serverless handlers."""
+
+import json
+from http.server import BaseHTTPRequestHandler
+from typing import Any, Dict, Iterable, Optional, Tuple
+from urllib.parse import unquote_plus
+
+# One decoder for every request body; json.loads would re-check its arguments
+# and sniff the byte encoding on each call
+_JSON_DECODER = json.JSONDecoder()
+
+
+def parse_query(path: str) -> Dict[str, str]:
+    """
+    Parse the query string of a request path into a flat dict.
+
+    Matches parse_qs for our links (first value wins, blank values dropped)
+    without building per-key lists, and only unquotes values that need it.
+    """
+    params: Dict[str, str] = {}
+    query = path.partition("?")[2].partition("#")[0]
+    if not query:
+        return params
+    for pair in query.split("&"):
+        key, _, value = pair.partition("=")
+        if not value:
+            continue
+        if "%" in key or "+" in key:
+            key = unquote_plus(key)
+        if key in params:
+            continue
+        if "%" in value or "+" in value:
+            value = unquote_plus(value)
+        params[key] = value
+    return params
+
+
+def send_body(
+    handler: BaseHTTPRequestHandler,
+    status: int,
+    body: bytes,
+    content_type: str,
+    headers: Iterable[Tuple[str, str]] = (),
+) -> None:
+    """Write a complete response with an explicit Content-Length."""
+    handler.send_response(status)
+    for name, value in headers:
+        handler.send_header(name, value)
+    handler.send_header("Content-Length", str(len(body)))
+    handler.send_header("Content-Type", content_type)
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+def send_redirect(handler: BaseHTTPRequestHandler, location: str) -> None:
+    """Write an empty-bodied 302 redirect."""
+    handler.send_response(302)
+    handler.send_header("Location", location)
+    handler.send_header("Content-Length", "0")
+    handler.end_headers()
+
+
+def read_json(handler: BaseHTTPRequestHandler) -> Optional[Any]:
+    """Read and decode a JSON request body, or None if absent or malformed."""
+    try:
+        content_length = int(handler.headers.get("Content-Length", "0"))
+    except ValueError:
+        return None
+    if content_length <= 0:
+        return None
+    raw = handler.rfile.read(content_length)
+    try:
+        return _JSON_DECODER.decode(raw.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return None
@@ -4,13 +4,15 @@ Includes time decay for user preferences: recent interactions are weighted
 more heavily than older ones using exponential decay.
 """
 
+import heapq
 import math
 from datetime import datetime, timezone, timedelta
+from operator import itemgetter
 from typing import Any, Dict, List, Optional
 
 from .supabase_client import ensure_ok, supabase
 from .logger import get_logger
-from .categories import CONNECT3_CATEGORIES, NUM_CATEGORIES as _CATEGORY_COUNT
+from .categories import CATEGORY_SELECT_COLUMNS, CONNECT3_CATEGORIES, NUM_CATEGORIES as _CATEGORY_COUNT
 
 logger = get_logger(__name__)
 
@@ -27,7 +29,7 @@ def _parse_date(value: Optional[str]) -> Optional[datetime]:
   if not value:
     return None
   try:
-    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return datetime.fromisoformat(value)
   except Exception:
     return None
 
@@ -102,7 +104,7 @@ def _compute_time_decayed_preferences(
     time_decay = 1.0
     if created_at_str:
       try:
-        created_at = datetime.fromisoformat(created_at_str.replace("Z", "+00:00"))
+        created_at = datetime.fromisoformat(created_at_str)
         days_old = (now - created_at).total_seconds() / 86400
         time_decay = math.exp(-decay_lambda * days_old)
       except Exception:
@@ -160,11 +162,12 @@ def _cluster_match(event: Dict[str, Any], prefs: Dict[str, Any], decayed_prefs:
   return float(val) if isinstance(val, (int, float)) else DEFAULT_CATEGORY_SCORE
 
 
-def _urgency_score(event: Dict[str, Any]) -> float:
+def _urgency_score(event: Dict[str, Any], now: Optional[datetime] = None) -> float:
   event_date = _parse_date(_event_start_value(event))
   if not event_date:
     return 0.0
-  now = datetime.now(timezone.utc)
+  if now is None:
+    now = datetime.now(timezone.utc)
   days_until = (event_date - now).days
   return max(0, MAX_URGENCY_SCORE - days_until)
 
@@ -175,7 +178,7 @@ def rank_events_for_user(user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
   if not user_resp.data:
     raise RuntimeError(f"User not found: {user_id}")
 
-  prefs_resp = supabase.table("user_preferences").select("*").eq("subscriber_id", user_id).limit(1).execute()
+  prefs_resp = supabase.table("user_preferences").select(CATEGORY_SELECT_COLUMNS).eq("subscriber_id", user_id).limit(1).execute()
   ensure_ok(prefs_resp, action="select user_preferences")
   if not prefs_resp.data:
     raise RuntimeError(f"User preferences not found: {user_id}")
@@ -184,10 +187,12 @@ def rank_events_for_user(user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
   # Compute time-decayed preferences from interaction history
   decayed_prefs = _compute_time_decayed_preferences(user_id)
 
+  # One clock reading for the query and every urgency score in this ranking
+  now = datetime.now(timezone.utc)
   events_resp = (
     supabase.table("events")
     .select("*")
-    .gte("start", datetime.now(timezone.utc).isoformat())
+    .gte("start", now.isoformat())
     .order("start", desc=False)
     .limit(100)
     .execute()
@@ -195,15 +200,24 @@ def rank_events_for_user(user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
   ensure_ok(events_resp, action="select events")
   events = events_resp.data or []
 
-  ranked = []
+  # Preference lookups depend only on the category, so resolve each once
+  match_by_category: Dict[Any, float] = {}
+  scored = []
   for evt in events:
-    cluster_match = _cluster_match(evt, prefs, decayed_prefs)
-    urgency = _urgency_score(evt)
+    category = evt.get("category")
+    cluster_match = match_by_category.get(category)
+    if cluster_match is None:
+      cluster_match = match_by_category[category] = _cluster_match(evt, prefs, decayed_prefs)
+    urgency = _urgency_score(evt, now)
     score = cluster_match * CLUSTER_MATCH_WEIGHT + urgency
-    ranked.append({**evt, "score": score, "cluster_match": cluster_match, "urgency_score": urgency})
-
-  ranked.sort(key=lambda e: e["score"], reverse=True)
-  return ranked[:limit]
+    scored.append((score, cluster_match, urgency, evt))
+
+  # Partial selection (stable, like sort + slice); only the winners get copied
+  top = heapq.nlargest(limit, scored, key=itemgetter(0))
+  return [
+    {**evt, "score": score, "cluster_match": cluster_match, "urgency_score": urgency}
+    for score, cluster_match, urgency, evt in top
+  ]
 
 
 class EventScoringService:
@@ -2,9 +2,14 @@
 Supabase client bootstrap.
 """
 
+import httpx
 from supabase import create_client, Client
+from supabase.lib.client_options import SyncClientOptions
 
 from .config import require_env, get_env
+from .logger import get_logger
+
+logger = get_logger(__name__)
 
 # Use the env names defined in the project .env
 SUPABASE_URL = get_env("SUPABASE_URL")
@@ -17,7 +22,32 @@ SUPABASE_KEY = (
 if not SUPABASE_URL or not SUPABASE_KEY:
   raise RuntimeError("Missing Supabase environment variables. Set SUPABASE_URL and SUPABASE_SERVICE_KEY (or SUPABASE_SECRET_KEY).")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# One pooled HTTP client for the whole process. Warm serverless invocations reuse
+# its open TLS connections instead of handshaking with Supabase on every request.
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=300)
+
+# retries=1 re-attempts a failed connect (e.g. a pooled connection the far end
+# already dropped) once before surfacing the error
+_http_client = httpx.Client(
+  timeout=HTTP_TIMEOUT,
+  follow_redirects=True,
+  transport=httpx.HTTPTransport(limits=HTTP_LIMITS, http2=True, retries=1),
+)
+
+supabase: Client = create_client(
+  SUPABASE_URL,
+  SUPABASE_KEY,
+  options=SyncClientOptions(httpx_client=_http_client),
+)
+
+
+def warm_connection() -> None:
+  """Open the pooled connection ahead of the first request (best effort)."""
+  try:
+    supabase.table("events").select("id").limit(1).execute()
+  except Exception as exc:
+    logger.warning("Supabase warm-up query failed: %s", exc)
 
 
 def ensure_ok(response, *, action: str) -> None:
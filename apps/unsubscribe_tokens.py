@@ -0,0 +1,33 @@
+"""Signed unsubscribe link tokens.
+
+The newsletter templates sign each link and api/unsubscribe.py verifies it, so
+both sides import the token function from here to keep them in lockstep.
+"""
+
+import functools
+import hashlib
+import hmac
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# hashlib normally wraps OpenSSL, which uses the CPU's SHA extensions when present
+if getattr(hashlib.sha256, "__name__", "") != "openssl_sha256":
+    logger.warning("hashlib.sha256 is not backed by OpenSSL; unsubscribe tokens will be slower")
+
+
+@functools.lru_cache(maxsize=8)
+def _hmac_prototype(secret: str) -> hmac.HMAC:
+    """Keyed HMAC state for the secret; copies skip re-running the key schedule."""
+    return hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256)
+
+
+# Repeat clicks (and link scanners) re-verify the same uid; the cache skips
+# recomputing the HMAC. Callers still compare with hmac.compare_digest.
+@functools.lru_cache(maxsize=4096)
+def unsubscribe_token(user_id: str, secret: str) -> str:
+    """Return the lowercase hex HMAC-SHA256 of the user id under the secret."""
+    mac = _hmac_prototype(secret).copy()
+    mac.update(user_id.encode("utf-8"))
+    return mac.hexdigest()
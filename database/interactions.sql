@@ -16,6 +16,34 @@ ALTER TABLE public.interactions
 ADD CONSTRAINT interactions_interaction_type_check
 CHECK (interaction_type IN ('like', 'dislike', 'click', 'view'));
 
+-- One row per (subscriber, event): the feedback API upserts on this key.
+-- Collapse any historical duplicates first, keeping the most recent row
+-- (rows with a NULL created_at rank last, so they are dropped first).
+DELETE FROM public.interactions
+WHERE ctid IN (
+  SELECT ctid
+  FROM (
+    SELECT ctid, ROW_NUMBER() OVER (
+      PARTITION BY subscriber_id, event_id
+      ORDER BY created_at DESC NULLS LAST, id DESC
+    ) AS rn
+    FROM public.interactions
+    WHERE subscriber_id IS NOT NULL AND event_id IS NOT NULL
+  ) ranked
+  WHERE rn > 1
+);
+
+ALTER TABLE public.interactions
+DROP CONSTRAINT IF EXISTS interactions_subscriber_event_key;
+
+ALTER TABLE public.interactions
+ADD CONSTRAINT interactions_subscriber_event_key UNIQUE (subscriber_id, event_id);
+
 CREATE INDEX IF NOT EXISTS idx_interactions_subscriber_id ON public.interactions(subscriber_id);
 CREATE INDEX IF NOT EXISTS idx_interactions_event_id ON public.interactions(event_id);
 CREATE INDEX IF NOT EXISTS idx_interactions_created_at ON public.interactions(created_at);
+
+-- Covering index for per-subscriber history reads (time decay, preference refresh)
+CREATE INDEX IF NOT EXISTS idx_interactions_subscriber_created
+ON public.interactions(subscriber_id, created_at)
+INCLUDE (event_id, interaction_type);
@@ -37,12 +37,15 @@ ON CONFLICT (event_id) DO UPDATE SET
     category = EXCLUDED.category;
 
 -- Step 4: Create indexes for fast similarity search
--- IVFFlat index for approximate nearest neighbor (ANN) search
--- lists = sqrt(n_rows) is a good starting point, using 100 for ~10k events
-CREATE INDEX IF NOT EXISTS idx_event_embeddings_v2_embedding 
-ON public.event_embeddings_v2 
-USING ivfflat (embedding vector_cosine_ops)
-WITH (lists = 100);
+-- HNSW index for approximate nearest neighbor (ANN) search (pgvector >= 0.5).
+-- Unlike IVFFlat it needs no training data, so it can be built before the
+-- table is populated and keeps its recall as events are added.
+-- Raise hnsw.ef_search (default 40) per session for better recall.
+DROP INDEX IF EXISTS public.idx_event_embeddings_v2_embedding;
+CREATE INDEX IF NOT EXISTS idx_event_embeddings_v2_embedding_hnsw
+ON public.event_embeddings_v2
+USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
 
 -- Category index for filtered searches
 CREATE INDEX IF NOT EXISTS idx_event_embeddings_v2_category 
@@ -81,7 +84,8 @@ BEGIN
     FROM public.event_embeddings_v2 e
     WHERE 
         (category_filter IS NULL OR e.category = category_filter)
-        AND 1 - (e.embedding <=> query_embedding) > match_threshold
+        AND e.embedding <=> query_embedding < 1 - match_threshold
+    -- ORDER BY distance + LIMIT is what lets the planner use the HNSW index
     ORDER BY e.embedding <=> query_embedding
     LIMIT match_count;
 END;
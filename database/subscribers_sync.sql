@@ -56,3 +56,21 @@ FROM public.profiles p
 ON CONFLICT (profile_id) DO UPDATE
   SET first_name = EXCLUDED.first_name,
       last_name = EXCLUDED.last_name;
+
+-- Bulk-set subscriber emails from a JSON array of {id, email} objects in one
+-- statement (used by scripts/sync_subscriber_emails_from_auth.py).
+-- Returns the number of rows updated.
+CREATE OR REPLACE FUNCTION public.update_subscriber_emails(payload JSONB)
+RETURNS integer AS $$
+DECLARE
+  v_count integer;
+BEGIN
+  UPDATE public.subscribers s
+  SET email = r.email
+  FROM jsonb_to_recordset(payload) AS r(id UUID, email TEXT)
+  WHERE s.id = r.id;
+
+  GET DIAGNOSTICS v_count = ROW_COUNT;
+  RETURN v_count;
+END;
+$$ LANGUAGE plpgsql;
@@ -22,4 +22,140 @@ CREATE TABLE IF NOT EXISTS public.user_preferences (
     UNIQUE(subscriber_id)
 );
 
+-- One row per subscriber: every writer upserts on subscriber_id. Tables created
+-- before the UNIQUE clause existed get the constraint here, after collapsing any
+-- duplicate rows (keeping the most recently updated; NULL updated_at ranks last).
+DELETE FROM public.user_preferences
+WHERE ctid IN (
+  SELECT ctid
+  FROM (
+    SELECT ctid, ROW_NUMBER() OVER (
+      PARTITION BY subscriber_id
+      ORDER BY updated_at DESC NULLS LAST, id DESC
+    ) AS rn
+    FROM public.user_preferences
+    WHERE subscriber_id IS NOT NULL
+  ) ranked
+  WHERE rn > 1
+);
+
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1
+    FROM pg_constraint c
+    JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = ANY (c.conkey)
+    WHERE c.conrelid = 'public.user_preferences'::regclass
+      AND c.contype IN ('u', 'p')
+      AND array_length(c.conkey, 1) = 1
+      AND a.attname = 'subscriber_id'
+  ) THEN
+    ALTER TABLE public.user_preferences
+    ADD CONSTRAINT user_preferences_subscriber_id_key UNIQUE (subscriber_id);
+  END IF;
+END $$;
+
 CREATE INDEX IF NOT EXISTS idx_user_preferences_subscriber_id ON public.user_preferences(subscriber_id);
+
+-- Apply one like/dislike to a category and renormalize all scores in a single
+-- statement (called from record_click below). Missing rows are
+-- created from a uniform baseline; p_initial_delta is the nudge applied to a
+-- brand-new row.
+CREATE OR REPLACE FUNCTION public.bump_preference(
+    p_subscriber_id UUID,
+    p_category TEXT,
+    p_delta DOUBLE PRECISION,
+    p_baseline DOUBLE PRECISION,
+    p_initial_delta DOUBLE PRECISION DEFAULT NULL
+)
+RETURNS void AS $$
+DECLARE
+  v_categories TEXT[];
+  v_is_new BOOLEAN;
+  v_current JSONB;
+  v_raw JSONB := '{}'::jsonb;
+  v_scores JSONB := '{}'::jsonb;
+  v_total DOUBLE PRECISION := 0;
+  v_score DOUBLE PRECISION;
+  v_cat TEXT;
+BEGIN
+  -- Every DOUBLE PRECISION column is a category score, so the category list
+  -- follows the table rather than being repeated here.
+  SELECT array_agg(column_name::text ORDER BY ordinal_position) INTO v_categories
+  FROM information_schema.columns
+  WHERE table_schema = 'public'
+    AND table_name = 'user_preferences'
+    AND data_type = 'double precision';
+
+  IF NOT (p_category = ANY (v_categories)) THEN
+    RAISE EXCEPTION 'Unknown preference category: %', p_category;
+  END IF;
+
+  INSERT INTO public.user_preferences (subscriber_id)
+  VALUES (p_subscriber_id)
+  ON CONFLICT (subscriber_id) DO NOTHING;
+  v_is_new := FOUND;
+
+  SELECT to_jsonb(up) INTO v_current
+  FROM public.user_preferences up
+  WHERE up.subscriber_id = p_subscriber_id
+  FOR UPDATE;
+
+  FOREACH v_cat IN ARRAY v_categories LOOP
+    IF v_is_new THEN
+      v_score := p_baseline;
+    ELSE
+      v_score := COALESCE((v_current ->> v_cat)::double precision, p_baseline);
+    END IF;
+    IF v_cat = p_category THEN
+      v_score := v_score + CASE WHEN v_is_new THEN COALESCE(p_initial_delta, p_delta) ELSE p_delta END;
+      v_score := LEAST(1.0, v_score);
+    END IF;
+    v_score := GREATEST(0.0, v_score);
+    v_raw := v_raw || jsonb_build_object(v_cat, v_score);
+    v_total := v_total + v_score;
+  END LOOP;
+
+  FOREACH v_cat IN ARRAY v_categories LOOP
+    IF v_total > 0 THEN
+      v_score := (v_raw ->> v_cat)::double precision / v_total;
+    ELSE
+      v_score := p_baseline;
+    END IF;
+    v_scores := v_scores || jsonb_build_object(v_cat, v_score);
+  END LOOP;
+
+  EXECUTE format(
+    'UPDATE public.user_preferences SET %s, updated_at = NOW() WHERE subscriber_id = $1',
+    (SELECT string_agg(format('%I = ($2 ->> %L)::double precision', c, c), ', ') FROM unnest(v_categories) AS c)
+  )
+  USING p_subscriber_id, v_scores;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Record one feedback click: upsert the (subscriber, event) interaction and,
+-- when p_update_preferences is set, apply bump_preference in the same
+-- transaction. api/feedback.py calls this once per request via supabase.rpc.
+CREATE OR REPLACE FUNCTION public.record_click(
+    p_subscriber_id UUID,
+    p_event_id TEXT,
+    p_action TEXT,
+    p_category TEXT,
+    p_update_preferences BOOLEAN,
+    p_delta DOUBLE PRECISION,
+    p_baseline DOUBLE PRECISION,
+    p_initial_delta DOUBLE PRECISION DEFAULT NULL
+)
+RETURNS void AS $$
+BEGIN
+  INSERT INTO public.interactions (subscriber_id, event_id, interaction_type, created_at)
+  VALUES (p_subscriber_id, p_event_id, p_action, NOW())
+  ON CONFLICT (subscriber_id, event_id)
+  DO UPDATE SET interaction_type = EXCLUDED.interaction_type,
+                created_at = EXCLUDED.created_at;
+
+  IF p_update_preferences THEN
+    PERFORM public.bump_preference(p_subscriber_id, p_category, p_delta, p_baseline, p_initial_delta);
+  END IF;
+END;
+$$ LANGUAGE plpgsql;
@@ -22,7 +22,7 @@ def main() -> None:
 
     subject = "Hello World"
     html = "<p>Hello World</p>"
-    logger.info(f"Sending hello-world test email to {args.to_email}")
+    logger.info("Sending hello-world test email to %s", args.to_email)
     send_email(args.to_email, subject, html)
     logger.info("Test email sent.")
 
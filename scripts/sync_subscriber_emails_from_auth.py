@@ -3,30 +3,29 @@
 import argparse
 import sys
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Dict, List
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
+from python_app.auth_users import auth_admin_available, fetch_auth_emails
 from python_app.logger import get_logger, setup_logging
 from python_app.supabase_client import ensure_ok, supabase
 
 logger = get_logger(__name__)
 
+# Rows per update_subscriber_emails RPC call (keeps request bodies bounded)
+UPDATE_BATCH_SIZE = 500
 
-def _get_admin():
-    auth = getattr(supabase, "auth", None)
-    return getattr(auth, "admin", None) if auth else None
 
-
-def _extract_email(resp: Any) -> Optional[str]:
-    user = getattr(resp, "user", None)
-    if user is None and isinstance(resp, dict):
-        user = resp.get("user")
-    if not user:
-        return None
-    if isinstance(user, dict):
-        return user.get("email")
-    return getattr(user, "email", None)
+def _apply_email_updates(updates: List[Dict[str, str]]) -> int:
+    """Write {id, email} pairs via the update_subscriber_emails RPC in batches."""
+    written = 0
+    for start in range(0, len(updates), UPDATE_BATCH_SIZE):
+        batch = updates[start:start + UPDATE_BATCH_SIZE]
+        resp = supabase.rpc("update_subscriber_emails", {"payload": batch}).execute()
+        ensure_ok(resp, action="rpc update_subscriber_emails")
+        written += int(resp.data or 0)
+    return written
 
 
 def main() -> None:
@@ -37,8 +36,7 @@ def main() -> None:
     parser.add_argument("--dry-run", action="store_true", help="Log updates without writing to Supabase.")
     args = parser.parse_args()
 
-    admin = _get_admin()
-    if not admin:
+    if not auth_admin_available():
         raise RuntimeError("Supabase auth admin client not available. Ensure SUPABASE_SERVICE_KEY is set.")
 
     resp = supabase.table("subscribers").select("id,profile_id,email").execute()
@@ -49,7 +47,9 @@ def main() -> None:
     updated = 0
     skipped = 0
     missing = 0
+    pending_updates: List[Dict[str, str]] = []
 
+    to_lookup: List[Dict[str, Any]] = []
     for row in rows:
         profile_id = row.get("profile_id")
         if not profile_id:
@@ -61,32 +61,26 @@ def main() -> None:
         if current_email and not args.overwrite:
             skipped += 1
             continue
+        to_lookup.append(row)
 
-        try:
-            auth_resp = admin.get_user_by_id(profile_id)
-        except Exception as exc:
-            logger.warning(f"Failed to fetch auth user {profile_id}: {exc}")
-            missing += 1
-            continue
+    # Admin API lookups run concurrently (one HTTPS call per profile)
+    auth_emails = fetch_auth_emails([row["profile_id"] for row in to_lookup])
 
-        email = _extract_email(auth_resp)
+    for row in to_lookup:
+        email = auth_emails.get(str(row["profile_id"]))
         if not email:
             missing += 1
             continue
 
         if args.dry_run:
-            logger.info(f"[dry-run] Would set subscriber {row.get('id')} email to {email}")
+            logger.info("[dry-run] Would set subscriber %s email to %s", row.get("id"), email)
             updated += 1
             continue
 
-        update_resp = (
-            supabase.table("subscribers")
-            .update({"email": email})
-            .eq("id", row.get("id"))
-            .execute()
-        )
-        ensure_ok(update_resp, action="update subscriber email")
-        updated += 1
+        pending_updates.append({"id": row.get("id"), "email": email})
+
+    if pending_updates:
+        updated += _apply_email_updates(pending_updates)
 
     logger.info(
         "Email sync complete: %s total profile-linked, %s updated, %s skipped, %s missing",
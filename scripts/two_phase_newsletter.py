@@ -7,6 +7,7 @@ Phase 2: Send preference-based newsletter for every subsequent iteration
 Optimized: Uses batch category fetching to reduce DB calls from N to 1.
 """
 
+import logging
 import math
 import random
 import sys
@@ -17,9 +18,14 @@ from typing import Dict, List, Any, Optional
 # Add parent directory to path so we can import python_app from any directory
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-from python_app.categories import CONNECT3_CATEGORIES, UNIFORM_BASELINE
+from python_app.categories import (
+    CATEGORY_SELECT_COLUMNS,
+    CONNECT3_CATEGORIES,
+    CONNECT3_CATEGORIES_SET,
+    UNIFORM_BASELINE,
+)
 from python_app.constants import PREFERENCE_DECAY_DAYS
-from python_app.email_sender import send_email
+from python_app.email_sender import SMTPSession, insert_email_logs, send_concurrently, send_email
 from python_app.email_templates import generate_personalized_email, format_category
 from python_app.logger import get_logger, setup_logging
 from python_app.supabase_client import supabase, ensure_ok
@@ -31,6 +37,10 @@ logger = get_logger(__name__)
 SITE_URL = get_env("NEXT_PUBLIC_SITE_URL") or get_env("NEXT_PUBLIC_APP_URL")
 FEEDBACK_BASE_URL = f"{SITE_URL.rstrip('/')}/feedback"
 DEFAULT_PHASE2_TOTAL = 9
+# Rows per user_preferences page (PostgREST's default max-rows is 1000)
+PREFERENCES_PAGE_SIZE = 1000
+# Ids per onboarding PATCH; keeps the PostgREST in.() filter well under URL limits
+ONBOARDING_UPDATE_BATCH_SIZE = 150
 MAX_EVENT_LOOKAHEAD_DAYS = 30
 
 CATEGORY_COLUMNS = CONNECT3_CATEGORIES
@@ -42,44 +52,78 @@ INTERACTION_WEIGHTS = {
     "dislike": -0.5,
 }
 
-def log_email_sent(profile_id: Optional[str], events_sent: List[str], status: str = "sent", error_message: str = None) -> None:
-    """Log email delivery to email_logs table."""
+def log_email_sent(
+    profile_id: Optional[str],
+    events_sent: List[str],
+    status: str = "sent",
+    error_message: str = None,
+    log_rows: Optional[List[Dict[str, Any]]] = None,
+) -> None:
+    """Log email delivery to email_logs (appended to log_rows for a later bulk insert when given)."""
     if not profile_id:
         logger.info("Skipping email_logs insert: no profile_id for subscriber.")
         return
-    try:
-        log_data = {
-            "user_id": profile_id,
-            "status": status,
-            "events_sent": events_sent,
-            "sent_at": datetime.now(timezone.utc).isoformat(),
-        }
-        if error_message:
-            log_data["error_message"] = error_message
-        
-        supabase.table("email_logs").insert(log_data).execute()
-        logger.debug(f"Logged email: user={profile_id[:8]}..., status={status}")
-    except Exception as e:
-        logger.warning(f"Failed to log email: {e}")
+    log_data = {
+        "user_id": profile_id,
+        "status": status,
+        "events_sent": events_sent,
+        "sent_at": datetime.now(timezone.utc).isoformat(),
+    }
+    if error_message:
+        log_data["error_message"] = error_message
+    if log_rows is None:
+        insert_email_logs([log_data])
+    else:
+        log_rows.append(log_data)
+    logger.debug("Logged email: user=%s..., status=%s", profile_id[:8], status)
 
-def log_probability_distribution(subscriber_id: Optional[str]) -> None:
-    """Log user preference distribution as a simple bar chart."""
-    if not subscriber_id:
-        return
-    try:
+def fetch_all_user_preferences() -> Dict[str, Dict[str, Any]]:
+    """
+    Load every user_preferences row, keyed by subscriber_id.
+
+    PostgREST caps each response at the project's max-rows setting, so rows
+    are read in pages ordered by subscriber_id until an empty page comes back.
+    Advancing by the rows actually returned keeps this correct even if the
+    server cap is below PREFERENCES_PAGE_SIZE.
+    """
+    prefs: Dict[str, Dict[str, Any]] = {}
+    offset = 0
+    while True:
         resp = (
             supabase.table("user_preferences")
-            .select("*")
-            .eq("subscriber_id", subscriber_id)
-            .limit(1)
+            .select(f"subscriber_id,{CATEGORY_SELECT_COLUMNS}")
+            .order("subscriber_id")
+            .range(offset, offset + PREFERENCES_PAGE_SIZE - 1)
             .execute()
         )
-        ensure_ok(resp, action="select user_preferences")
-        if not resp.data:
-            logger.info(f"No preference distribution for user {subscriber_id[:8]}...")
-            return
-        prefs = resp.data[0]
-        logger.info(f"Printing probability distribution for user {subscriber_id[:8]}...")
+        ensure_ok(resp, action="select user_preferences (all)")
+        rows = resp.data or []
+        if not rows:
+            return prefs
+        for row in rows:
+            if row.get("subscriber_id"):
+                prefs[row["subscriber_id"]] = row
+        offset += len(rows)
+
+def log_probability_distribution(subscriber_id: Optional[str], prefs: Optional[Dict[str, Any]] = None) -> None:
+    """Log user preference distribution as a simple bar chart."""
+    if not subscriber_id:
+        return
+    try:
+        if prefs is None:
+            resp = (
+                supabase.table("user_preferences")
+                .select(CATEGORY_SELECT_COLUMNS)
+                .eq("subscriber_id", subscriber_id)
+                .limit(1)
+                .execute()
+            )
+            ensure_ok(resp, action="select user_preferences")
+            if not resp.data:
+                logger.info("No preference distribution for user %s...", subscriber_id[:8])
+                return
+            prefs = resp.data[0]
+        logger.info("Printing probability distribution for user %s...", subscriber_id[:8])
         bar_scale = 20
         for cat in CATEGORY_COLUMNS:
             try:
@@ -87,44 +131,40 @@ def log_probability_distribution(subscriber_id: Optional[str]) -> None:
             except (TypeError, ValueError):
                 score = 0.0
             bar = "#" * max(0, int(round(score * bar_scale)))
-            logger.info(f"{cat.ljust(24)} {bar}")
+            logger.info("%-24s %s", cat, bar)
     except Exception as exc:
-        logger.warning(f"Failed to print probability distribution for user {subscriber_id[:8]}...: {exc}")
+        logger.warning("Failed to print probability distribution for user %s...: %s", subscriber_id[:8], exc)
 
 def ensure_user_preferences(subscriber_id: Optional[str]) -> bool:
     """Ensure a user_preferences row exists for the subscriber. Returns True if it existed."""
     if not subscriber_id:
         return False
+
+    prefs_payload = {"subscriber_id": subscriber_id}
+    for category in CATEGORY_COLUMNS:
+        prefs_payload[category] = UNIFORM_BASELINE
     try:
+        # Insert-if-missing in one round-trip; only a newly created row is returned
         resp = (
             supabase.table("user_preferences")
-            .select("id")
-            .eq("subscriber_id", subscriber_id)
-            .limit(1)
+            .upsert(prefs_payload, on_conflict="subscriber_id", ignore_duplicates=True)
             .execute()
         )
-        ensure_ok(resp, action="select user_preferences")
-        if resp.data:
-            return True
+        ensure_ok(resp, action="upsert user_preferences")
     except Exception as exc:
-        logger.warning(f"Failed to check user_preferences for {subscriber_id[:8]}...: {exc}")
+        logger.warning("Could not ensure user_preferences for %s...: %s", subscriber_id[:8], exc)
         return False
 
-    prefs_payload = {"subscriber_id": subscriber_id}
-    for category in CATEGORY_COLUMNS:
-        prefs_payload[category] = UNIFORM_BASELINE
-    try:
-        supabase.table("user_preferences").insert(prefs_payload).execute()
-        logger.info(f"Created user_preferences for subscriber {subscriber_id[:8]}...")
-    except Exception as exc:
-        logger.warning(f"Could not create user_preferences for {subscriber_id[:8]}...: {exc}")
-    return False
+    if resp.data:
+        logger.info("Created user_preferences for subscriber %s...", subscriber_id[:8])
+        return False
+    return True
 
 def _decay_multiplier(created_at: Optional[str]) -> float:
     if not created_at:
         return 1.0
     try:
-        ts = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        ts = datetime.fromisoformat(created_at)
     except Exception:
         return 1.0
     now = datetime.now(timezone.utc)
@@ -138,10 +178,13 @@ def refresh_preferences_from_interactions(subscriber_id: Optional[str]) -> Optio
     if not subscriber_id:
         return None
 
+    # Embed each interaction's event category via the interactions.event_id
+    # foreign key, so PostgREST does the join in one round trip
     interactions_resp = (
         supabase.table("interactions")
-        .select("event_id, interaction_type, created_at")
+        .select("event_id, interaction_type, created_at, events(category)")
         .eq("subscriber_id", subscriber_id)
+        .not_.is_("event_id", "null")
         .execute()
     )
     ensure_ok(interactions_resp, action="select interactions")
@@ -149,24 +192,11 @@ def refresh_preferences_from_interactions(subscriber_id: Optional[str]) -> Optio
     if not interactions:
         return None
 
-    event_ids = [i.get("event_id") for i in interactions if i.get("event_id")]
-    if not event_ids:
-        return None
-
-    events_resp = (
-        supabase.table("events")
-        .select("id, category")
-        .in_("id", event_ids)
-        .execute()
-    )
-    ensure_ok(events_resp, action="select events (categories)")
-    event_categories = {e.get("id"): e.get("category") for e in (events_resp.data or [])}
-
     scores = {cat: UNIFORM_BASELINE for cat in CATEGORY_COLUMNS}
     for interaction in interactions:
-        event_id = interaction.get("event_id")
-        category = event_categories.get(event_id)
-        if not category or category not in CATEGORY_COLUMNS:
+        event = interaction.get("events") or {}
+        category = event.get("category")
+        if not category or category not in CONNECT3_CATEGORIES_SET:
             continue
         base_weight = INTERACTION_WEIGHTS.get(interaction.get("interaction_type"), 0.0)
         if base_weight == 0.0:
@@ -186,19 +216,10 @@ def refresh_preferences_from_interactions(subscriber_id: Optional[str]) -> Optio
 
     prefs_resp = (
         supabase.table("user_preferences")
-        .select("id")
-        .eq("subscriber_id", subscriber_id)
-        .limit(1)
+        .upsert({"subscriber_id": subscriber_id, **normalized}, on_conflict="subscriber_id")
         .execute()
     )
-    ensure_ok(prefs_resp, action="select user_preferences")
-    if prefs_resp.data:
-        supabase.table("user_preferences").update(normalized).eq("subscriber_id", subscriber_id).execute()
-    else:
-        supabase.table("user_preferences").insert({
-            "subscriber_id": subscriber_id,
-            **normalized,
-        }).execute()
+    ensure_ok(prefs_resp, action="upsert user_preferences")
 
     return normalized
 
@@ -209,7 +230,7 @@ def _parse_event_datetime(value: Any) -> Optional[datetime]:
         return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
     if isinstance(value, str):
         try:
-            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            parsed = datetime.fromisoformat(value)
         except Exception:
             return None
         if parsed.tzinfo is None:
@@ -270,16 +291,32 @@ def is_new_recipient(user: Dict[str, Any]) -> bool:
     first_sent_at = user.get("first_newsletter_sent_at")
     return bool(is_new_flag) or not first_sent_at
 
-def mark_user_onboarded(user: Dict[str, Any]) -> None:
-    """Mark a user as no longer new after the initial newsletter."""
-    payload: Dict[str, Any] = {"is_new_recipient": False}
-    if not user.get("first_newsletter_sent_at"):
-        payload["first_newsletter_sent_at"] = datetime.now(timezone.utc).isoformat()
-    try:
-        resp = supabase.table("subscribers").update(payload).eq("id", user["id"]).execute()
-        ensure_ok(resp, action="update subscriber onboarding status")
-    except Exception as e:
-        logger.warning(f"Failed to update onboarding status for user {user.get('id')}: {e}")
+def mark_users_onboarded(users: List[Dict[str, Any]]) -> None:
+    """
+    Mark users as no longer new after the initial newsletter.
+
+    Issues one update per payload shape (first send vs. repeat) and chunk of
+    ONBOARDING_UPDATE_BATCH_SIZE ids rather than one per user.
+    """
+    first_send_ids = [u["id"] for u in users if not u.get("first_newsletter_sent_at")]
+    repeat_ids = [u["id"] for u in users if u.get("first_newsletter_sent_at")]
+    batches = (
+        (first_send_ids, {"is_new_recipient": False, "first_newsletter_sent_at": datetime.now(timezone.utc).isoformat()}),
+        (repeat_ids, {"is_new_recipient": False}),
+    )
+    for ids, payload in batches:
+        for start in range(0, len(ids), ONBOARDING_UPDATE_BATCH_SIZE):
+            chunk = ids[start:start + ONBOARDING_UPDATE_BATCH_SIZE]
+            try:
+                resp = supabase.table("subscribers").update(payload).in_("id", chunk).execute()
+                ensure_ok(resp, action="update subscriber onboarding status")
+            except Exception as e:
+                logger.warning(
+                    "Failed to update onboarding status for %d users (%s): %s",
+                    len(chunk),
+                    ", ".join(str(i) for i in chunk),
+                    e,
+                )
 
 def build_event_from_post(
     post: Dict[str, Any],
@@ -347,7 +384,12 @@ def _annotate_group_header(
 def _resolve_category(post: Dict[str, Any]) -> str:
     return post.get("category") or "general"
 
-def send_phase1_random_newsletter(user: Dict, posts: List[Dict]) -> List[str]:
+def send_phase1_random_newsletter(
+    user: Dict,
+    posts: List[Dict],
+    session: Optional[SMTPSession] = None,
+    log_rows: Optional[List[Dict[str, Any]]] = None,
+) -> List[str]:
     """Phase 1: Send 9 random events for initial discovery"""
     # Select 9 random events
     sample = random.sample(posts, min(9, len(posts)))
@@ -367,27 +409,33 @@ def send_phase1_random_newsletter(user: Dict, posts: List[Dict]) -> List[str]:
     subject = f"Discover {len(events)} Events - Tell Us What You Like!"
     
     try:
-        logger.info(f"Sending Phase 1 email to {user['email']}")
-        send_email(user["email"], subject, html)
-        log_email_sent(user.get("profile_id"), sent_ids, status="sent")
+        logger.info("Sending Phase 1 email to %s", user["email"])
+        send_email(user["email"], subject, html, session=session)
+        log_email_sent(user.get("profile_id"), sent_ids, status="sent", log_rows=log_rows)
     except Exception as e:
-        log_email_sent(user.get("profile_id"), sent_ids, status="failed", error_message=str(e))
+        log_email_sent(user.get("profile_id"), sent_ids, status="failed", error_message=str(e), log_rows=log_rows)
         raise
     
     return sent_ids
 
-def get_ranked_user_categories(subscriber_id: Optional[str]) -> List[tuple[str, float]]:
+def get_ranked_user_categories(
+    subscriber_id: Optional[str],
+    prefs: Optional[Dict[str, Any]] = None,
+) -> List[tuple[str, float]]:
     """
     Return all categories ranked by preference score (highest first).
     Falls back to uniform scores if preferences are missing.
+    Pass prefs when the row is already loaded to skip the lookup.
     """
     if not subscriber_id:
         return [(cat, UNIFORM_BASELINE) for cat in CATEGORY_COLUMNS]
 
-    resp = supabase.table("user_preferences").select("*").eq("subscriber_id", subscriber_id).limit(1).execute()
+    if prefs is None:
+        resp = supabase.table("user_preferences").select(CATEGORY_SELECT_COLUMNS).eq("subscriber_id", subscriber_id).limit(1).execute()
+        if resp.data:
+            prefs = resp.data[0]
 
-    if resp.data and len(resp.data) > 0:
-        prefs = resp.data[0]
+    if prefs:
         category_scores = []
         for idx, cat in enumerate(CATEGORY_COLUMNS):
             raw_score = prefs.get(cat, UNIFORM_BASELINE)
@@ -400,32 +448,28 @@ def get_ranked_user_categories(subscriber_id: Optional[str]) -> List[tuple[str,
         # Sort by score desc, then stable by original category order
         category_scores.sort(key=lambda x: (-x[1], x[2]))
         ranked = [(cat, score) for cat, score, _ in category_scores]
-        logger.info(f"User {subscriber_id[:8]}... preference scores: {ranked[:5]}")
+        logger.info("User %s... preference scores: %s", subscriber_id[:8], ranked[:5])
         return ranked
 
-    logger.warning(f"No user_preferences found for user {subscriber_id}, using uniform defaults")
+    logger.warning("No user_preferences found for user %s, using uniform defaults", subscriber_id)
     return [(cat, UNIFORM_BASELINE) for cat in CATEGORY_COLUMNS]
 
-def _category_has_events(posts: List[Dict[str, Any]], category: str, exclude_ids: set) -> bool:
+def group_posts_by_category(posts: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Bucket posts by resolved category in one pass, preserving order."""
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
     for post in posts:
-        event_id = post.get("id")
-        if event_id in exclude_ids:
-            continue
-        if _resolve_category(post) == category:
-            return True
-    return False
+        grouped.setdefault(_resolve_category(post), []).append(post)
+    return grouped
+
+def _category_has_events(posts_by_category: Dict[str, List[Dict[str, Any]]], category: str, exclude_ids: set) -> bool:
+    return any(post.get("id") not in exclude_ids for post in posts_by_category.get(category, ()))
 
-def get_events_by_category(posts: List[Dict], category: str, exclude_ids: set, limit: int) -> List[Dict]:
+def get_events_by_category(posts_by_category: Dict[str, List[Dict]], category: str, exclude_ids: set, limit: int) -> List[Dict]:
     """Get events matching a specific category"""
-    candidates = []
-    for post in posts:
-        event_id = post.get("id")
-        if event_id in exclude_ids:
-            continue
-        
-        cat = _resolve_category(post)
-        if cat == category:
-            candidates.append(post)
+    candidates = [
+        post for post in posts_by_category.get(category, ())
+        if post.get("id") not in exclude_ids
+    ]
 
     if not candidates or limit <= 0:
         return []
@@ -445,6 +489,7 @@ def get_exploration_events(posts: List[Dict], exclude_ids: set, preferred_catego
     This helps users discover new interests outside their current preferences.
     """
     # Find events in non-preferred categories
+    preferred = set(preferred_categories)
     exploration_candidates = []
     for post in posts:
         event_id = post.get("id")
@@ -453,7 +498,7 @@ def get_exploration_events(posts: List[Dict], exclude_ids: set, preferred_catego
         
         category = _resolve_category(post)
         # Only include if NOT in user's preferred categories
-        if category not in preferred_categories and category != "general":
+        if category not in preferred and category != "general":
             exploration_candidates.append((post, category))
     
     # Randomly select from exploration candidates
@@ -488,23 +533,36 @@ def store_user_top_categories(subscriber_id: Optional[str], categories: List[str
         supabase.table("subscribers").update({
             "top_categories": categories
         }).eq("id", subscriber_id).execute()
-        logger.info(f"Stored top categories: {categories}")
+        logger.info("Stored top categories: %s", categories)
     except Exception as e:
-        logger.warning(f"Could not store top categories: {e}")
-
-
-def send_phase2_preference_newsletter(user: Dict, posts: List[Dict], phase1_ids: List[str]):
+        logger.warning("Could not store top categories: %s", e)
+
+
+def send_phase2_preference_newsletter(
+    user: Dict,
+    posts: List[Dict],
+    phase1_ids: List[str],
+    posts_by_category: Optional[Dict[str, List[Dict]]] = None,
+    session: Optional[SMTPSession] = None,
+    prefs_by_subscriber: Optional[Dict[str, Dict[str, Any]]] = None,
+    log_rows: Optional[List[Dict[str, Any]]] = None,
+):
     """Phase 2: Send preference-based newsletter with top-2 + random diversity mix."""
+    if posts_by_category is None:
+        posts_by_category = group_posts_by_category(posts)
     subscriber_id = user.get("id")
-    refresh_preferences_from_interactions(subscriber_id)
-    ranked_categories = get_ranked_user_categories(subscriber_id)
+    # Freshly recomputed scores win; otherwise use the batch-loaded row (if any)
+    prefs = refresh_preferences_from_interactions(subscriber_id)
+    if prefs is None and prefs_by_subscriber is not None:
+        prefs = prefs_by_subscriber.get(subscriber_id)
+    ranked_categories = get_ranked_user_categories(subscriber_id, prefs)
     ranked_only = [cat for cat, _score in ranked_categories]
     exclude_ids = set(phase1_ids)  # Don't repeat Phase 1 events
 
     # Choose top 2 categories by preference that actually have events
     selected_categories: List[str] = []
     for cat in ranked_only:
-        if _category_has_events(posts, cat, exclude_ids):
+        if _category_has_events(posts_by_category, cat, exclude_ids):
             selected_categories.append(cat)
         if len(selected_categories) >= 2:
             break
@@ -517,7 +575,7 @@ def send_phase2_preference_newsletter(user: Dict, posts: List[Dict], phase1_ids:
                 break
             if d in selected_categories:
                 continue
-            if _category_has_events(posts, d, exclude_ids):
+            if _category_has_events(posts_by_category, d, exclude_ids):
                 selected_categories.append(d)
 
     if len(selected_categories) < 2:
@@ -526,33 +584,34 @@ def send_phase2_preference_newsletter(user: Dict, posts: List[Dict], phase1_ids:
                 break
             if cat in selected_categories:
                 continue
-            if _category_has_events(posts, cat, exclude_ids):
+            if _category_has_events(posts_by_category, cat, exclude_ids):
                 selected_categories.append(cat)
 
-    logger.info(f"User's preferred categories (with events): {selected_categories}")
+    logger.info("User's preferred categories (with events): %s", selected_categories)
     
     # Store user's top categories for future reference
     store_user_top_categories(user.get("id"), selected_categories)
     
     # Up to 3 from category 1
     if len(selected_categories) >= 1:
-        cat1_events = get_events_by_category(posts, selected_categories[0], exclude_ids, 3)
-        logger.debug(f"{len(cat1_events)} from {selected_categories[0]}")
+        cat1_events = get_events_by_category(posts_by_category, selected_categories[0], exclude_ids, 3)
+        logger.debug("%d from %s", len(cat1_events), selected_categories[0])
     else:
         cat1_events = []
     
     # Up to 3 from category 2
     if len(selected_categories) >= 2:
-        cat2_events = get_events_by_category(posts, selected_categories[1], exclude_ids, 3)
-        logger.debug(f"{len(cat2_events)} from {selected_categories[1]}")
+        cat2_events = get_events_by_category(posts_by_category, selected_categories[1], exclude_ids, 3)
+        logger.debug("%d from %s", len(cat2_events), selected_categories[1])
     else:
         cat2_events = []
     
     # Fill remaining slots with random valid events for diversity
     remaining = DEFAULT_PHASE2_TOTAL - (len(cat1_events) + len(cat2_events))
     exploration_events = get_exploration_events(posts, exclude_ids, selected_categories, remaining)
-    exploration_cats = [e.get('category', 'unknown') for e in exploration_events]
-    logger.debug(f"{len(exploration_events)} exploration from: {exploration_cats}")
+    if logger.isEnabledFor(logging.DEBUG):
+        exploration_cats = [e.get('category', 'unknown') for e in exploration_events]
+        logger.debug("%d exploration from: %s", len(exploration_events), exploration_cats)
 
     _annotate_group_header(
         cat1_events,
@@ -571,24 +630,53 @@ def send_phase2_preference_newsletter(user: Dict, posts: List[Dict], phase1_ids:
     selected_events = cat1_events + cat2_events + exploration_events
 
     # Send email
-    log_probability_distribution(subscriber_id)
+    log_probability_distribution(subscriber_id, prefs)
     html = generate_personalized_email(user, selected_events, FEEDBACK_BASE_URL)
     subject = f"{len(selected_events)} Events Curated Just For You!"
     
     sent_ids = [e.get("event_id") or e.get("id") for e in selected_events]
     try:
-        logger.info(f"Sending Phase 2 email to {user['email']}")
-        send_email(user["email"], subject, html)
-        log_email_sent(user.get("profile_id"), sent_ids, status="sent")
+        logger.info("Sending Phase 2 email to %s", user["email"])
+        send_email(user["email"], subject, html, session=session)
+        log_email_sent(user.get("profile_id"), sent_ids, status="sent", log_rows=log_rows)
     except Exception as e:
-        log_email_sent(user.get("profile_id"), sent_ids, status="failed", error_message=str(e))
+        log_email_sent(user.get("profile_id"), sent_ids, status="failed", error_message=str(e), log_rows=log_rows)
         raise
+
+def send_phase2_newsletters(
+    users: List[Dict],
+    posts: List[Dict],
+    posts_by_category: Dict[str, List[Dict]],
+    prefs_by_subscriber: Optional[Dict[str, Dict[str, Any]]] = None,
+    log_rows: Optional[List[Dict[str, Any]]] = None,
+) -> None:
+    """
+    Send Phase 2 newsletters to returning users concurrently.
+
+    Each user costs a few Supabase round trips plus an SMTP send, all I/O, so
+    users go through send_concurrently (one SMTP session per worker thread).
+    """
+    def _send(user: Dict, session: SMTPSession) -> None:
+        logger.info("Processing: %s", user["email"])
+        send_phase2_preference_newsletter(
+            user,
+            posts,
+            [],
+            posts_by_category,
+            session=session,
+            prefs_by_subscriber=prefs_by_subscriber,
+            log_rows=log_rows,
+        )
+
+    sent, failed = send_concurrently(users, _send, label=lambda user: user["email"])
+    logger.info("Phase 2 delivery complete: %d sent, %d failed", sent, failed)
+
 """
 Function to run the newsletter flow
 """
 def run_two_phase_newsletter():
     posts = load_posts()
-    logger.info(f"Loaded {len(posts)} events from Supabase")
+    logger.info("Loaded %d events from Supabase", len(posts))
     
     # Get subscribers (source of truth for newsletter delivery)
     users_resp = supabase.table("subscribers").select(
@@ -604,65 +692,82 @@ def run_two_phase_newsletter():
         if full_name:
             user["name"] = full_name
 
+    # One query for every subscriber's preferences instead of several per user
+    prefs_by_subscriber = fetch_all_user_preferences()
+
     new_users = []
     returning_users = []
     for user in users:
         if not user.get("email"):
             continue
         if user.get("is_unsubscribed"):
-            logger.info(f"Skipping unsubscribed user: {user.get('email')}")
+            logger.info("Skipping unsubscribed user: %s", user.get("email"))
             continue
         if is_new_recipient(user):
             new_users.append(user)
         else:
-            if not ensure_user_preferences(user.get("id")):
-                logger.info(f"No preferences found for {user.get('email')}; restarting Phase 1.")
+            if user.get("id") not in prefs_by_subscriber and not ensure_user_preferences(user.get("id")):
+                logger.info("No preferences found for %s; restarting Phase 1.", user.get("email"))
                 new_users.append(user)
                 continue
             returning_users.append(user)
 
-    if returning_users:
-        logger.info("="*50)
-        logger.info("PREFERENCE-BASED NEWSLETTER (RETURNING USERS)")
-        logger.info("="*50)
-
-        for user in returning_users:
-            logger.info(f"Processing: {user['email']}")
-            try:
-                send_phase2_preference_newsletter(user, posts, [])
-                logger.info("Sent: Personalized events")
-            except Exception as exc:
-                logger.error(f"Failed to send personalized newsletter to {user['email']}: {exc}")
-
-    phase1_sent = {}
-    if new_users:
-        logger.info("="*50)
-        logger.info("PHASE 1: INITIAL DISCOVERY (NEW USERS)")
-        logger.info("="*50)
-
-        for user in new_users:
-            logger.info(f"Processing: {user['email']}")
-
-            # NOTE: We no longer clear interactions - they are valuable click data!
-            # Old code deleted user clicks which broke interaction detection.
-
-            # Send Phase 1
-            try:
-                ensure_user_preferences(user.get("id"))
-                sent_ids = send_phase1_random_newsletter(user, posts)
-                phase1_sent[user["id"]] = sent_ids
-                mark_user_onboarded(user)
-                logger.info("Phase 1 sent: 9 random events")
-            except Exception as exc:
-                logger.error(f"Failed to send Phase 1 to {user['email']}: {exc}")
-
-        logger.info("="*50)
-        logger.info("SKIPPING PHASE 2 WAIT (CRON MODE)")
-        logger.info("New users will receive Phase 2 on the next scheduled run.")
-        logger.info("="*50)
-        logger.info("TWO-PHASE NEWSLETTER COMPLETE!")
-        logger.info("="*50)
-        return
+    # One SMTP login for Phase 1 instead of one per recipient (Phase 2 workers
+    # each hold their own), and one bulk email_logs write at the end instead
+    # of an insert per email
+    log_rows: List[Dict[str, Any]] = []
+    try:
+        with SMTPSession() as session:
+            if returning_users:
+                logger.info("="*50)
+                logger.info("PREFERENCE-BASED NEWSLETTER (RETURNING USERS)")
+                logger.info("="*50)
+
+                send_phase2_newsletters(
+                    returning_users,
+                    posts,
+                    group_posts_by_category(posts),
+                    prefs_by_subscriber=prefs_by_subscriber,
+                    log_rows=log_rows,
+                )
+
+            phase1_sent = {}
+            if new_users:
+                logger.info("="*50)
+                logger.info("PHASE 1: INITIAL DISCOVERY (NEW USERS)")
+                logger.info("="*50)
+
+                onboarded: List[Dict[str, Any]] = []
+                try:
+                    for user in new_users:
+                        logger.info("Processing: %s", user["email"])
+
+                        # NOTE: We no longer clear interactions - they are valuable click data!
+                        # Old code deleted user clicks which broke interaction detection.
+
+                        # Send Phase 1
+                        try:
+                            ensure_user_preferences(user.get("id"))
+                            sent_ids = send_phase1_random_newsletter(user, posts, session=session, log_rows=log_rows)
+                            phase1_sent[user["id"]] = sent_ids
+                            onboarded.append(user)
+                            logger.info("Phase 1 sent: 9 random events")
+                        except Exception as exc:
+                            logger.error("Failed to send Phase 1 to %s: %s", user["email"], exc)
+                finally:
+                    # Flag everyone who was sent Phase 1, even if the run stops early
+                    mark_users_onboarded(onboarded)
+
+                logger.info("="*50)
+                logger.info("SKIPPING PHASE 2 WAIT (CRON MODE)")
+                logger.info("New users will receive Phase 2 on the next scheduled run.")
+                logger.info("="*50)
+                logger.info("TWO-PHASE NEWSLETTER COMPLETE!")
+                logger.info("="*50)
+                return
+    finally:
+        insert_email_logs(log_rows)
+        logger.debug("Wrote %d email_logs rows", len(log_rows))
     
     logger.info("="*50)
     logger.info("TWO-PHASE NEWSLETTER COMPLETE!")
@@ -672,8 +777,7 @@ if __name__ == "__main__":
     setup_logging()
     
     # Silence verbose HTTP client logs (httpx, httpcore, hpack)
-    import logging as _logging
     for noisy_logger in ['httpx', 'httpcore', 'hpack', 'h2', 'urllib3']:
-        _logging.getLogger(noisy_logger).setLevel(_logging.WARNING)
+        logging.getLogger(noisy_logger).setLevel(logging.WARNING)
     
     run_two_phase_newsletter()
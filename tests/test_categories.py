@@ -1,5 +1,8 @@
 """Tests for python_app/categories.py category definitions."""
 
+import re
+from pathlib import Path
+
 import pytest
 
 
@@ -43,6 +46,20 @@ class TestCategoryConstants:
         assert VALID_API_CATEGORIES == CONNECT3_CATEGORIES_SET | {"general"}
 
 
+class TestCategorySchema:
+    """Tests that the SQL schema stays in step with the Python categories."""
+
+    def test_user_preferences_score_columns_match_categories(self):
+        """bump_preference derives categories from these columns, so they must match."""
+        from python_app.categories import CONNECT3_CATEGORIES
+
+        sql = (Path(__file__).parent.parent / "database" / "user_preferences.sql").read_text()
+        create_table = sql.split("CREATE TABLE IF NOT EXISTS public.user_preferences", 1)[1].split(");", 1)[0]
+        columns = re.findall(r"^\s+(\w+) DOUBLE PRECISION", create_table, re.MULTILINE)
+
+        assert columns == CONNECT3_CATEGORIES
+
+
 class TestCategoryDescriptions:
     """Tests for category descriptions."""
 
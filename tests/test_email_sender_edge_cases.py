@@ -93,6 +93,83 @@ class TestSendEmailRetry:
         assert mock_smtp.login.call_count == 3
 
 
+    @patch('python_app.email_sender.GMAIL_USER', 'test@gmail.com')
+    @patch('python_app.email_sender.GMAIL_APP_PASSWORD', 'testpass')
+    @patch('python_app.email_sender.smtplib.SMTP_SSL')
+    def test_auth_error_not_retried(self, mock_smtp_class):
+        """Rejected credentials fail on the first attempt."""
+        mock_smtp = MagicMock()
+        mock_smtp.login.side_effect = smtplib.SMTPAuthenticationError(535, b"bad credentials")
+        mock_smtp_class.return_value.__enter__ = Mock(return_value=mock_smtp)
+        mock_smtp_class.return_value.__exit__ = Mock(return_value=False)
+
+        with pytest.raises(smtplib.SMTPAuthenticationError):
+            send_email("recipient@example.com", "Test", "<p>Test</p>")
+
+        assert mock_smtp.login.call_count == 1
+
+
+class TestSMTPSession:
+    """Tests for the shared SMTP connection used by bulk sends."""
+
+    @patch('python_app.email_sender.GMAIL_USER', 'test@gmail.com')
+    @patch('python_app.email_sender.GMAIL_APP_PASSWORD', 'testpass')
+    @patch('python_app.email_sender.smtplib.SMTP_SSL')
+    def test_one_login_for_many_sends(self, mock_smtp_class):
+        """A session logs in once and quits on exit."""
+        from python_app.email_sender import SMTPSession
+
+        mock_smtp = mock_smtp_class.return_value
+        with SMTPSession() as session:
+            for i in range(3):
+                send_email(f"user{i}@example.com", "Subject", "<p>Hi</p>", session=session)
+
+        mock_smtp_class.assert_called_once()
+        mock_smtp.login.assert_called_once()
+        assert mock_smtp.send_message.call_count == 3
+        mock_smtp.quit.assert_called_once()
+
+    @patch('python_app.email_sender.GMAIL_USER', 'test@gmail.com')
+    @patch('python_app.email_sender.GMAIL_APP_PASSWORD', 'testpass')
+    @patch('python_app.email_sender.smtplib.SMTP_SSL')
+    def test_reconnects_after_disconnect(self, mock_smtp_class):
+        """A dropped connection is discarded and the retry reconnects."""
+        from python_app.email_sender import SMTPSession
+
+        broken = MagicMock()
+        broken.send_message.side_effect = smtplib.SMTPServerDisconnected("gone")
+        healthy = MagicMock()
+        mock_smtp_class.side_effect = [broken, healthy]
+
+        with patch.object(send_email.retry, 'sleep'):
+            with SMTPSession() as session:
+                send_email("user@example.com", "Subject", "<p>Hi</p>", session=session)
+
+        assert mock_smtp_class.call_count == 2
+        healthy.send_message.assert_called_once()
+
+
+    @patch('python_app.email_sender.GMAIL_USER', 'test@gmail.com')
+    @patch('python_app.email_sender.GMAIL_APP_PASSWORD', 'testpass')
+    @patch('python_app.email_sender.smtplib.SMTP_SSL')
+    def test_idle_session_probed_and_replaced(self, mock_smtp_class):
+        """After an idle gap a dead connection is replaced before sending."""
+        from python_app.email_sender import SMTPSession, SMTP_IDLE_CHECK_SEC
+
+        stale = MagicMock()
+        stale.noop.side_effect = smtplib.SMTPServerDisconnected("idle timeout")
+        fresh = MagicMock()
+        mock_smtp_class.side_effect = [stale, fresh]
+
+        with SMTPSession() as session:
+            send_email("a@example.com", "Subject", "<p>Hi</p>", session=session)
+            session._last_used -= SMTP_IDLE_CHECK_SEC + 1  # simulate an idle gap
+            send_email("b@example.com", "Subject", "<p>Hi</p>", session=session)
+
+        stale.send_message.assert_called_once()
+        fresh.send_message.assert_called_once()
+
+
 class TestEmailMessage:
     """Tests for email message construction."""
 
@@ -140,6 +217,68 @@ class TestEmailDeliveryService:
         assert hasattr(service, 'send_test_email')
 
 
+class TestSendNewsletters:
+    """Tests for the threaded bulk send."""
+
+    @patch('python_app.email_sender.time.sleep')
+    @patch('python_app.email_sender.smtplib.SMTP_SSL')
+    def test_counts_results_and_closes_sessions(self, mock_smtp_class, _sleep):
+        """Every user is attempted, failures are isolated, sessions are closed
+        and the collected email_logs rows are written in one bulk call."""
+        service = EmailDeliveryService()
+        sent = []
+
+        def fake_send(user_id, events, session=None, log_rows=None):
+            assert session is not None
+            log_rows.append({"user_id": user_id})
+            if user_id == "bad":
+                raise RuntimeError("boom")
+            sent.append(user_id)
+
+        with patch.object(service, 'send_personalized_email', side_effect=fake_send), \
+                patch('python_app.email_sender.SMTPSession.close') as close, \
+                patch('python_app.email_sender.insert_email_logs') as insert_logs, \
+                patch.object(logger, 'info') as log_info:
+            service.send_newsletters({"u1": [], "bad": [], "u2": [], "u3": []})
+
+        assert sorted(sent) == ["u1", "u2", "u3"]
+        assert close.call_count >= 1
+        insert_logs.assert_called_once()
+        assert len(insert_logs.call_args[0][0]) == 4
+        log_info.assert_called_with("Email delivery complete: 3 sent, 1 failed")
+
+    def test_send_concurrently_gives_each_thread_one_closed_session(self):
+        """Workers reuse their own session across items and all sessions are closed."""
+        import threading
+        from python_app.email_sender import send_concurrently
+
+        sessions_by_thread = {}
+
+        def fake_send(item, session):
+            seen = sessions_by_thread.setdefault(threading.get_ident(), session)
+            assert seen is session
+            if item == "bad":
+                raise RuntimeError("boom")
+
+        with patch('python_app.email_sender.SMTPSession.close') as close:
+            sent, failed = send_concurrently(["a", "bad", "b", "c", "d"], fake_send)
+
+        assert (sent, failed) == (4, 1)
+        assert close.call_count == len(set(map(id, sessions_by_thread.values())))
+
+    def test_insert_email_logs_chunks(self):
+        """Log rows are inserted in EMAIL_LOG_BATCH_SIZE chunks."""
+        from python_app.email_sender import EMAIL_LOG_BATCH_SIZE, insert_email_logs
+
+        rows = [{"user_id": str(i)} for i in range(EMAIL_LOG_BATCH_SIZE + 1)]
+        with patch('python_app.email_sender.supabase') as mock_supabase:
+            mock_supabase.table.return_value.insert.return_value.execute.return_value.error = None
+            insert_email_logs(rows)
+
+        inserts = mock_supabase.table.return_value.insert.call_args_list
+        assert [len(c.args[0]) for c in inserts] == [EMAIL_LOG_BATCH_SIZE, 1]
+
+
 class TestLogging:
     """Tests for logging configuration."""
 
@@ -257,3 +257,33 @@ class TestGeneratePersonalizedEmail:
         html = generate_personalized_email(user, events, "https://example.com/feedback")
         
         assert "5 events" in html
+
+    def test_escapes_raw_date_and_category(self):
+        """Unparseable dates and odd category names are HTML-escaped."""
+        from python_app.email_templates import generate_personalized_email
+
+        user = {"id": "user-123", "name": "User"}
+        events = [{"id": "evt1", "start": "<b>soon</b>", "category": "a<b>"}]
+
+        html = generate_personalized_email(user, events, "https://example.com/feedback")
+
+        assert "&lt;b&gt;soon&lt;/b&gt;" in html
+        assert "<b>soon</b>" not in html
+        assert "A&lt;b&gt;" in html
+
+    def test_date_line_formats_same_and_cross_day_ranges(self):
+        """Same-day ranges show the end time only; date lines are reused across recipients."""
+        from python_app.email_templates import _when_html, generate_personalized_email
+
+        _when_html.cache_clear()
+        events = [
+            {"id": "evt1", "start": "2025-03-01T18:00:00+00:00", "end": "2025-03-01T20:00:00+00:00"},
+            {"id": "evt2", "start": "2025-03-01T18:00:00+00:00", "end": "2025-03-02T09:00:00+00:00"},
+        ]
+
+        first = generate_personalized_email({"id": "u1"}, events, "https://example.com/feedback")
+        generate_personalized_email({"id": "u2"}, events, "https://example.com/feedback")
+
+        assert "March 01, 2025 at 06:00 PM - 08:00 PM" in first
+        assert "March 01, 2025 at 06:00 PM - March 02, 2025 at 09:00 AM" in first
+        assert _when_html.cache_info().hits == 2
@@ -196,6 +196,15 @@ class TestValidateCategory:
         assert validate_category("tech-innovation") == "general"  # dash not allowed
         assert validate_category("tech123") == "general"  # numbers not allowed
 
+    def test_repeated_invalid_category_logged_each_time(self):
+        """Every invalid category is logged, not just the first occurrence."""
+        from unittest.mock import patch
+        from api.feedback import validate_category
+        with patch("api.feedback.logger") as mock_logger:
+            validate_category("unknown_xyz")
+            validate_category("unknown_xyz")
+        assert mock_logger.warning.call_count == 2
+
 
 class TestValidateAction:
     """Edge case tests for action validation."""
@@ -223,6 +232,15 @@ class TestValidateAction:
         assert validate_action("love") == "like"
         assert validate_action("share") == "like"
 
+    def test_repeated_invalid_action_logged_each_time(self):
+        """Every invalid action is logged, not just the first occurrence."""
+        from unittest.mock import patch
+        from api.feedback import validate_action
+        with patch("api.feedback.logger") as mock_logger:
+            validate_action("love")
+            validate_action("love")
+        assert mock_logger.warning.call_count == 2
+
     def test_action_uppercase_normalized(self):
         """Uppercase action is lowercased."""
         from api.feedback import validate_action
@@ -310,6 +328,14 @@ class TestIsWithinDecayWindow:
         recent = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
         assert is_within_decay_window(recent) is True
 
+    def test_naive_timestamp_treated_as_utc(self):
+        """Timestamps without an offset are interpreted as UTC."""
+        from api.feedback import is_within_decay_window
+        recent = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+        old = (datetime.now(timezone.utc) - timedelta(days=20)).replace(tzinfo=None).isoformat()
+        assert is_within_decay_window(recent) is True
+        assert is_within_decay_window(old) is False
+
 
 class TestRateLimiting:
     """Edge case tests for rate limiting function."""
@@ -331,3 +357,152 @@ class TestRateLimiting:
         """None user_id is not rate limited."""
         from api.feedback import is_rate_limited
         assert is_rate_limited(None) is False
+
+    def test_limit_reached_then_window_expires(self):
+        """Requests beyond the limit are rejected until the window slides past them."""
+        from unittest.mock import patch
+        from api.feedback import (
+            RATE_LIMIT_MAX_REQUESTS,
+            RATE_LIMIT_WINDOW_SECONDS,
+            _rate_limit_store,
+            is_rate_limited,
+        )
+        test_user = "test-user-rate-limit-2"
+        _rate_limit_store.pop(test_user, None)
+
+        with patch("api.feedback.time.time", return_value=1000.0):
+            for _ in range(RATE_LIMIT_MAX_REQUESTS):
+                assert is_rate_limited(test_user) is False
+            assert is_rate_limited(test_user) is True
+
+        with patch("api.feedback.time.time", return_value=1000.0 + RATE_LIMIT_WINDOW_SECONDS + 1):
+            assert is_rate_limited(test_user) is False
+        assert len(_rate_limit_store[test_user]) == 1
+
+    def test_store_evicts_least_recent_user(self):
+        """The store never tracks more than RATE_LIMIT_MAX_TRACKED_USERS users."""
+        from unittest.mock import patch
+        from api.feedback import _rate_limit_store, is_rate_limited
+
+        _rate_limit_store.clear()
+        with patch("api.feedback.RATE_LIMIT_MAX_TRACKED_USERS", 2):
+            is_rate_limited("user-a")
+            is_rate_limited("user-b")
+            is_rate_limited("user-a")  # refresh a, so b is now least recent
+            is_rate_limited("user-c")
+        assert list(_rate_limit_store) == ["user-a", "user-c"]
+
+    def test_redis_script_decides_limit(self):
+        """With Upstash configured, one EVAL call checks the shared window and records the hit."""
+        from unittest.mock import MagicMock, patch
+        from api.feedback import RATE_LIMIT_MAX_REQUESTS, is_rate_limited
+
+        redis_http = MagicMock()
+        redis_http.post.return_value.json.return_value = {"result": 1}
+        with patch("api.feedback._redis_http", redis_http), \
+                patch("api.feedback._redis_disabled_until", 0.0), \
+                patch("api.feedback.UPSTASH_REDIS_REST_URL", "https://redis.example"):
+            assert is_rate_limited("test-user-redis") is True
+
+        redis_http.post.assert_called_once()
+        command = redis_http.post.call_args.kwargs["json"]
+        assert command[0] == "EVAL"
+        assert command[3] == "connect3:feedback:ratelimit:test-user-redis"
+        assert command[6] == str(RATE_LIMIT_MAX_REQUESTS)
+        # The ZADD is guarded by the count check inside the script
+        script = command[1]
+        assert script.index("ZCARD") < script.index("ZADD")
+
+    def test_redis_failure_falls_back_to_memory(self):
+        """A Redis error falls back to the in-memory limiter and pauses Redis for a cooldown."""
+        from unittest.mock import MagicMock, patch
+        from api.feedback import _rate_limit_store, is_rate_limited
+
+        redis_http = MagicMock()
+        redis_http.post.side_effect = RuntimeError("connection refused")
+        _rate_limit_store.pop("test-user-redis-down", None)
+        with patch("api.feedback._redis_http", redis_http), \
+                patch("api.feedback._redis_disabled_until", 0.0), \
+                patch("api.feedback.UPSTASH_REDIS_REST_URL", "https://redis.example"):
+            assert is_rate_limited("test-user-redis-down") is False
+            assert is_rate_limited("test-user-redis-down") is False
+        assert len(_rate_limit_store["test-user-redis-down"]) == 2
+        # The second request skipped Redis instead of waiting on it again
+        assert redis_http.post.call_count == 1
+
+
+class TestRecordInteraction:
+    """Tests for the record_click RPC call."""
+
+    USER = "12345678-1234-1234-1234-123456789abc"
+
+    def _record(self, *args, **kwargs):
+        from unittest.mock import MagicMock, patch
+        from api.feedback import record_interaction
+
+        mock_supabase = MagicMock()
+        mock_supabase.rpc.return_value.execute.return_value = MagicMock(error=None)
+        with patch("api.feedback.supabase", mock_supabase):
+            ok = record_interaction(self.USER, "evt1", *args, **kwargs)
+        return ok, mock_supabase
+
+    def test_like_bumps_category_in_one_rpc(self):
+        """A like is stored and bumps its category through a single RPC."""
+        ok, mock_supabase = self._record("tech_innovation", "like")
+        assert ok is True
+        mock_supabase.table.assert_not_called()
+        name, params = mock_supabase.rpc.call_args.args
+        assert name == "record_click"
+        assert params["p_subscriber_id"] == self.USER
+        assert params["p_update_preferences"] is True
+        assert params["p_delta"] > 0
+
+    def test_click_does_not_touch_preferences(self):
+        """Clicks are stored as interactions but do not move scores."""
+        _, mock_supabase = self._record("tech_innovation", "click")
+        params = mock_supabase.rpc.call_args.args[1]
+        assert params["p_action"] == "click"
+        assert params["p_update_preferences"] is False
+
+    def test_general_or_outside_decay_skips_preferences(self):
+        """General-category feedback and stale emails only store the interaction."""
+        _, mock_supabase = self._record("general", "like")
+        assert mock_supabase.rpc.call_args.args[1]["p_update_preferences"] is False
+        _, mock_supabase = self._record("tech_innovation", "dislike", apply_preferences=False)
+        assert mock_supabase.rpc.call_args.args[1]["p_update_preferences"] is False
+
+    def test_returns_false_on_error(self):
+        """Database errors are reported as False, not raised."""
+        from unittest.mock import MagicMock, patch
+        from api.feedback import record_interaction
+
+        mock_supabase = MagicMock()
+        mock_supabase.rpc.side_effect = RuntimeError("boom")
+        with patch("api.feedback.supabase", mock_supabase):
+            assert record_interaction(self.USER, "evt1", "tech_innovation", "like") is False
+
+
+class TestFeedbackHandler:
+    """Tests for the do_GET request flow."""
+
+    def test_redirect_sent_before_database_writes(self):
+        """The 302 is written and flushed before the interaction is stored."""
+        from unittest.mock import MagicMock, patch
+        from api.feedback import handler
+
+        calls = []
+        h = handler.__new__(handler)
+        h.path = "/api/feedback?uid=12345678-1234-1234-1234-123456789abc&eid=evt1&cat=tech_innovation&action=like"
+        h.send_response = MagicMock(side_effect=lambda code: calls.append(("status", code)))
+        h.send_header = MagicMock()
+        h.end_headers = MagicMock()
+        h.wfile = MagicMock()
+        h.wfile.flush.side_effect = lambda: calls.append(("flush",))
+
+        with patch("api.feedback.is_rate_limited", return_value=False), \
+                patch("api.feedback.record_interaction", side_effect=lambda *a: calls.append(("record",))):
+            h.do_GET()
+
+        assert calls == [("status", 302), ("flush",), ("record",)]
+        h.send_header.assert_any_call("Content-Length", "0")
+
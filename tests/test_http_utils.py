@@ -0,0 +1,78 @@
+"""Tests for python_app/http_utils.py handler helpers."""
+
+from unittest.mock import MagicMock
+
+
+class TestParseQuery:
+    """Tests for the handlers' query-string parser."""
+
+    def test_first_value_wins_and_blank_dropped(self):
+        """Repeated keys keep the first value; empty values are ignored."""
+        from python_app.http_utils import parse_query
+        assert parse_query("/api/feedback?uid=a&uid=b&cat=&eid=e1") == {"uid": "a", "eid": "e1"}
+
+    def test_percent_and_plus_decoded(self):
+        """Encoded values (e.g. the sent timestamp) are unquoted."""
+        from python_app.http_utils import parse_query
+        params = parse_query("/api/feedback?sent=2024-01-15T10%3A00%3A00%2B00%3A00&note=a+b")
+        assert params == {"sent": "2024-01-15T10:00:00+00:00", "note": "a b"}
+
+    def test_no_query(self):
+        """A path without a query string yields no params."""
+        from python_app.http_utils import parse_query
+        assert parse_query("/api/feedback") == {}
+
+
+class TestSendBody:
+    """Tests for the shared response writer."""
+
+    def test_writes_length_extra_headers_and_body(self):
+        """Extra headers come first, then Content-Length and Content-Type."""
+        from python_app.http_utils import send_body
+
+        handler = MagicMock()
+        send_body(handler, 201, b"{}", "application/json", headers=[("Vary", "Origin")])
+
+        handler.send_response.assert_called_once_with(201)
+        assert [c.args for c in handler.send_header.call_args_list] == [
+            ("Vary", "Origin"),
+            ("Content-Length", "2"),
+            ("Content-Type", "application/json"),
+        ]
+        handler.wfile.write.assert_called_once_with(b"{}")
+
+    def test_redirect_has_empty_body(self):
+        """Redirects carry Location and a zero Content-Length."""
+        from python_app.http_utils import send_redirect
+
+        handler = MagicMock()
+        send_redirect(handler, "https://connect3.app")
+
+        handler.send_response.assert_called_once_with(302)
+        handler.send_header.assert_any_call("Location", "https://connect3.app")
+        handler.send_header.assert_any_call("Content-Length", "0")
+        handler.wfile.write.assert_not_called()
+
+
+class TestReadJson:
+    """Tests for request body decoding."""
+
+    def _handler(self, body: bytes, length: str):
+        handler = MagicMock()
+        handler.headers = {"Content-Length": length}
+        handler.rfile.read.return_value = body
+        return handler
+
+    def test_decodes_object(self):
+        """A UTF-8 JSON body is decoded."""
+        from python_app.http_utils import read_json
+        body = '{"firstName": "Zoë"}'.encode("utf-8")
+        assert read_json(self._handler(body, str(len(body)))) == {"firstName": "Zoë"}
+
+    def test_malformed_bodies_return_none(self):
+        """Bad JSON, bad UTF-8 or a bad Content-Length yield None instead of raising."""
+        from python_app.http_utils import read_json
+        assert read_json(self._handler(b"{not json", "9")) is None
+        assert read_json(self._handler(b"\xff\xfe{}", "4")) is None
+        assert read_json(self._handler(b"{}", "abc")) is None
+        assert read_json(self._handler(b"", "0")) is None
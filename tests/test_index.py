@@ -0,0 +1,84 @@
+"""Tests for api/index.py route dispatch."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def no_warm_connection():
+    """Keep dispatch tests off the network."""
+    with patch("python_app.supabase_client.warm_connection") as warm, \
+         patch("api.index.warm_connection", warm):
+        yield warm
+
+
+def test_routes_resolve_to_endpoint_handlers():
+    """Each public path maps to its endpoint module's handler functions."""
+    from api import feedback, subscribe, unsubscribe
+    from api.index import resolve_route
+
+    assert resolve_route("/feedback?uid=abc&eid=1") == {"GET": feedback.handle_get}
+    assert resolve_route("/api/subscribe")["POST"] is subscribe.handle_post
+    assert resolve_route("/subscribe/")["OPTIONS"] is subscribe.handle_options
+    assert resolve_route("/unsubscribe?uid=abc&token=t") == {"GET": unsubscribe.handle_get}
+
+
+def test_unknown_path_not_routed():
+    """Paths outside the route table (including near-miss prefixes) are not routed."""
+    from api.index import resolve_route
+
+    assert resolve_route("/") is None
+    assert resolve_route("/feedbacks") is None
+    assert resolve_route("/api/other") is None
+
+
+def test_dispatch_runs_endpoint_function():
+    """A routed request is passed to the endpoint function for its method."""
+    from api import index
+    from api.index import handler
+
+    h = handler.__new__(handler)
+    h.path = "/unsubscribe?uid=abc"
+    h.command = "GET"
+    handle_get = MagicMock()
+    with patch.dict(index.UNSUBSCRIBE, {"GET": handle_get}):
+        h.do_GET()
+    handle_get.assert_called_once_with(h)
+    assert type(h) is handler
+
+
+def test_dispatch_rejects_unsupported_method():
+    """A routed path without a function for the method gets a 405."""
+    from api.index import handler
+
+    h = handler.__new__(handler)
+    h.path = "/unsubscribe"
+    h.command = "POST"
+    h.send_error = MagicMock()
+    h.do_POST()
+    h.send_error.assert_called_once_with(405)
+
+
+def test_import_does_not_warm_connection(no_warm_connection):
+    """Importing the module never queries Supabase."""
+    import importlib
+    from api import index
+
+    importlib.reload(index)
+    no_warm_connection.assert_not_called()
+
+
+def test_first_dispatch_warms_connection_once(no_warm_connection):
+    """The connection is warmed on the first routed request only."""
+    from api import index
+    from api.index import handler
+
+    h = handler.__new__(handler)
+    h.path = "/unsubscribe"
+    h.command = "GET"
+    with patch.object(index, "_warmed", False), \
+         patch.dict(index.UNSUBSCRIBE, {"GET": MagicMock()}):
+        h.do_GET()
+        h.do_GET()
+    no_warm_connection.assert_called_once_with()
@@ -83,3 +83,29 @@ def test_rank_events_for_user_prioritizes_preference_and_urgency(monkeypatch):
   assert ids[0] == "near-pref"
   # "far-pref" should rank above "near-nopref" due to strong preference weight
   assert ids.index("far-pref") < ids.index("near-nopref")
+
+
+def test_rank_events_for_user_limit_keeps_order_and_ties(monkeypatch):
+  monkeypatch.setenv("SUPABASE_URL", "http://localhost")
+  monkeypatch.setenv("SUPABASE_SERVICE_KEY", "key")
+  import python_app.scoring as scoring
+  importlib.reload(scoring)
+
+  # Undated events all score on preference alone; equal scores keep input order
+  events = [
+    {"id": "low", "category": "sports_fitness"},
+    {"id": "tie-a", "category": "tech_innovation"},
+    {"id": "tie-b", "category": "tech_innovation"},
+    {"id": "tie-c", "category": "tech_innovation"},
+  ]
+  fake = _FakeSupabase(
+    users=[{"id": "u1"}],
+    prefs=[{"subscriber_id": "u1", "tech_innovation": 1.0, "sports_fitness": 0.1}],
+    events=events,
+  )
+  monkeypatch.setattr(scoring, "supabase", fake)
+
+  ranked = scoring.rank_events_for_user("u1", limit=2)
+
+  assert [e["id"] for e in ranked] == ["tie-a", "tie-b"]
+  assert ranked[0]["score"] == 1.0 * scoring.CLUSTER_MATCH_WEIGHT
@@ -134,6 +134,15 @@ class TestUrgencyScore:
         # Days until is negative (-1), so score = 30 - (-1) = 31 or higher
         assert score > MAX_URGENCY_SCORE
 
+    def test_urgency_uses_supplied_now(self):
+        """A caller-supplied clock reading is used instead of the current time."""
+        from python_app.scoring import _urgency_score, MAX_URGENCY_SCORE
+
+        now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        event = {"event_date": "2024-01-11T12:00:00+00:00"}
+
+        assert _urgency_score(event, now) == MAX_URGENCY_SCORE - 10
+
 
 class TestClusterMatch:
     """Edge case tests for cluster matching."""
@@ -0,0 +1,39 @@
+"""Tests for api/subscribe.py input validation."""
+
+import pytest
+
+
+@pytest.mark.parametrize("email", [
+    "student@unimelb.edu.au",
+    "first.last+news@example.com",
+    "a@b.co",
+])
+def test_valid_emails_accepted(email):
+    """Ordinary addresses pass validation."""
+    from api.subscribe import _is_valid_email
+    assert _is_valid_email(email) is True
+
+
+@pytest.mark.parametrize("email", [
+    "",
+    "no-at-sign.com",
+    "@example.com",
+    "user@",
+    "user@example",
+    "user@.com",
+    "user@example.",
+    "user@@example.com",
+    "us er@example.com",
+    "user@exa\tmple.com",
+])
+def test_malformed_emails_rejected(email):
+    """Addresses missing a local part, domain dot, or containing whitespace fail."""
+    from api.subscribe import _is_valid_email
+    assert _is_valid_email(email) is False
+
+
+def test_overlong_email_rejected():
+    """Addresses beyond the RFC 5321 254-char limit are rejected outright."""
+    from api.subscribe import EMAIL_MAX_LENGTH, _is_valid_email
+    email = "a" * (EMAIL_MAX_LENGTH - len("@example.com") + 1) + "@example.com"
+    assert _is_valid_email(email) is False
@@ -0,0 +1,59 @@
+"""Tests for scripts/two_phase_newsletter.py."""
+
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+os.environ.setdefault("NEXT_PUBLIC_SITE_URL", "http://localhost:3000")
+
+try:
+    from scripts import two_phase_newsletter
+    TWO_PHASE_AVAILABLE = True
+except (RuntimeError, ImportError):
+    TWO_PHASE_AVAILABLE = False
+
+
+pytestmark = pytest.mark.skipif(
+    not TWO_PHASE_AVAILABLE,
+    reason="two_phase_newsletter requires configured environment variables"
+)
+
+
+class TestMarkUsersOnboarded:
+    """Tests for the batched onboarding status update."""
+
+    def _users(self, count, sent_at=None):
+        return [{"id": f"user-{i}", "first_newsletter_sent_at": sent_at} for i in range(count)]
+
+    def test_ids_are_split_into_bounded_chunks(self):
+        """More ids than the batch size are sent as several in_() updates."""
+        size = two_phase_newsletter.ONBOARDING_UPDATE_BATCH_SIZE
+        users = self._users(size * 2 + 1)
+        mock_supabase = MagicMock()
+        update = mock_supabase.table.return_value.update.return_value
+
+        with patch.object(two_phase_newsletter, "supabase", mock_supabase), \
+             patch.object(two_phase_newsletter, "ensure_ok"):
+            two_phase_newsletter.mark_users_onboarded(users)
+
+        chunks = [call.args[1] for call in update.in_.call_args_list]
+        assert [len(c) for c in chunks] == [size, size, 1]
+        assert [i for c in chunks for i in c] == [u["id"] for u in users]
+
+    def test_failed_chunk_does_not_stop_later_chunks(self):
+        """A failing chunk is logged with its ids and the rest still update."""
+        size = two_phase_newsletter.ONBOARDING_UPDATE_BATCH_SIZE
+        users = self._users(size + 1, sent_at="2024-01-01T00:00:00+00:00")
+        mock_supabase = MagicMock()
+        execute = mock_supabase.table.return_value.update.return_value.in_.return_value.execute
+        execute.side_effect = [Exception("URI too long"), MagicMock()]
+
+        with patch.object(two_phase_newsletter, "supabase", mock_supabase), \
+             patch.object(two_phase_newsletter, "ensure_ok"), \
+             patch.object(two_phase_newsletter, "logger") as mock_logger:
+            two_phase_newsletter.mark_users_onboarded(users)
+
+        assert execute.call_count == 2
+        mock_logger.warning.assert_called_once()
+        assert "user-0" in mock_logger.warning.call_args.args[2]
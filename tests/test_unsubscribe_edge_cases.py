@@ -23,6 +23,14 @@ class TestExpectedToken:
         
         assert _expected_token(user_id, secret) == expected
 
+    def test_email_link_token_validates(self):
+        """Tokens signed into newsletter links pass the endpoint's check."""
+        from api.unsubscribe import _is_valid_token
+        from python_app.email_templates import _expected_unsubscribe_token
+
+        token = _expected_unsubscribe_token("test-user", "test-secret")
+        assert _is_valid_token("test-user", token, "test-secret") is True
+
     def test_token_different_users_different_tokens(self):
         """Different users get different tokens."""
         from api.unsubscribe import _expected_token
@@ -146,6 +154,16 @@ class TestIsValidToken:
         
         assert _is_valid_token(user_id, valid_token[:32], secret) is False
 
+    def test_malformed_token_skips_hmac(self):
+        """Wrong-length or non-hex tokens are rejected without computing the HMAC."""
+        from unittest.mock import patch
+        from api.unsubscribe import _is_valid_token
+
+        with patch("api.unsubscribe._expected_token") as expected:
+            assert _is_valid_token("user", "a" * 63, "secret") is False
+            assert _is_valid_token("user", "g" * 64, "secret") is False
+            expected.assert_not_called()
+
     def test_token_from_different_user_fails(self):
         """Token from different user fails."""
         from api.unsubscribe import _is_valid_token, _expected_token
@@ -198,13 +216,13 @@ class TestSendPlainHelper:
         handler.wfile = Mock()
         handler.wfile.write = Mock()
         
-        _send_plain(handler, 200, "test message")
+        _send_plain(handler, 200, b"test message")
         
         handler.send_response.assert_called_with(200)
         handler.send_header.assert_called_with("Content-Type", "text/plain; charset=utf-8")
 
     def test_send_plain_writes_message(self):
-        """_send_plain writes encoded message."""
+        """_send_plain writes the pre-encoded message."""
         from api.unsubscribe import _send_plain
         from unittest.mock import Mock
         
@@ -212,7 +230,7 @@ class TestSendPlainHelper:
         handler.wfile = Mock()
         handler.wfile.write = Mock()
         
-        _send_plain(handler, 200, "test message")
+        _send_plain(handler, 200, b"test message")
         
         handler.wfile.write.assert_called_with(b"test message")
 
@@ -229,7 +247,7 @@ class TestSendHtmlHelper:
         handler.wfile = Mock()
         handler.wfile.write = Mock()
         
-        _send_html(handler, 200, "<html></html>")
+        _send_html(handler, 200, b"<html></html>")
         
         handler.send_response.assert_called_with(200)
         handler.send_header.assert_called_with("Content-Type", "text/html; charset=utf-8")